@@ -0,0 +1,79 @@
+import logging
+import math
+from typing import Any, Optional
+
+import faiss
+
+import config
+
+logger = logging.getLogger(__name__)
+
+def ivf_list_count(num_vectors: int) -> int:
+    if config.FAISS_IVF_NLIST > 0:
+        return config.FAISS_IVF_NLIST
+    return max(1, min(int(4 * math.sqrt(num_vectors)), num_vectors // config.FAISS_IVF_MIN_POINTS_PER_LIST))
+
+def pq_subquantizers(dimension: int) -> int:
+    subquantizers = min(config.FAISS_PQ_M, dimension)
+    while dimension % subquantizers:
+        subquantizers -= 1
+    return subquantizers
+
+def index_factory_string(index_type: str, dimension: int, num_vectors: int) -> str:
+    encoding = "SQ8" if config.FAISS_SCALAR_QUANTIZATION else "Flat"
+    if index_type == "flat":
+        return encoding
+    if index_type == "ivf_flat":
+        return f"IVF{ivf_list_count(num_vectors)},{encoding}"
+    if index_type == "ivf_pq":
+        return f"IVF{ivf_list_count(num_vectors)},PQ{pq_subquantizers(dimension)}x{config.FAISS_PQ_NBITS}"
+    if index_type == "hnsw":
+        return f"HNSW{config.FAISS_HNSW_M}" + ("_SQ8" if config.FAISS_SCALAR_QUANTIZATION else "")
+    raise ValueError(f"Unknown FAISS index type '{index_type}'. Expected one of: {', '.join(config.FAISS_INDEX_TYPES)}.")
+
+def is_exact_index(index: Any) -> bool:
+    return isinstance(faiss.downcast_index(index), faiss.IndexFlat)
+
+def configure_index_search(
+    index: Any,
+    nprobe: int = config.FAISS_IVF_NPROBE,
+    ef_search: int = config.FAISS_HNSW_EF_SEARCH
+) -> Any:
+    base_index = faiss.downcast_index(index)
+    if isinstance(base_index, faiss.IndexIVF):
+        base_index.nprobe = min(nprobe, base_index.nlist)
+    elif isinstance(base_index, faiss.IndexHNSW):
+        base_index.hnsw.efSearch = ef_search
+    return index
+
+def search_parameters(index: Any, selector: Any) -> Any:
+    # IVF and HNSW indexes reject the generic parameter type, and a fresh parameter object would reset their search breadth.
+    base_index = faiss.downcast_index(index)
+    if isinstance(base_index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=base_index.nprobe)
+    if isinstance(base_index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=base_index.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+def build_ann_index(
+    exact_index: Any,
+    index_type: Optional[str] = None,
+    min_vectors: int = config.FAISS_ANN_MIN_VECTORS
+) -> Any:
+    index_type = index_type or config.FAISS_INDEX_TYPE
+    if index_type == "flat" and not config.FAISS_SCALAR_QUANTIZATION:
+        return exact_index
+    num_vectors = int(exact_index.ntotal)
+    if num_vectors < min_vectors:
+        logger.info("Keeping an exact index for %d vectors; '%s' needs at least %d to train.", num_vectors, index_type, min_vectors)
+        return exact_index
+
+    factory_string = index_factory_string(index_type, exact_index.d, num_vectors)
+    vectors = exact_index.reconstruct_n(0, num_vectors)
+    ann_index = faiss.index_factory(exact_index.d, factory_string, exact_index.metric_type)
+    if isinstance(ann_index, faiss.IndexHNSW):
+        ann_index.hnsw.efConstruction = config.FAISS_HNSW_EF_CONSTRUCTION
+    ann_index.train(vectors)
+    ann_index.add(vectors)
+    logger.info("Built a %s index over %d vectors.", factory_string, num_vectors)
+    return configure_index_search(ann_index)
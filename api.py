@@ -1,54 +1,281 @@
-from fastapi import APIRouter, HTTPException, Request
-from models import QueryRequest, RecommendResponse, RecommendedAssessment
-from services import get_recommendations
-from typing import List
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from models import BatchQueryRequest, BatchRecommendResponse, QueryRequest, RecommendResponse, RecommendedAssessment
+from concurrency import ServerBusyError, StageError, StageTimeoutError, request_slot
+from metrics import STAGE_ERRORS, registry
+from reloader import ReloadInProgressError
+from typing import Any, Dict, List, Optional
+import hmac
+import json
 import os
+import config
 
 router = APIRouter()
 
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
+
+def verify_admin_key(x_admin_key: Optional[str]):
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_API_KEY to enable them.")
+    if not hmac.compare_digest(x_admin_key or "", ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="Invalid or missing admin key.")
+
+def error_stage(error: Exception) -> str:
+    if isinstance(error, ServerBusyError):
+        return "queue"
+    if isinstance(error, (StageTimeoutError, StageError)):
+        return error.stage
+    if isinstance(error, ValueError):
+        return "request"
+    return "unknown"
+
+def pipeline_http_error(error: Exception) -> HTTPException:
+    stage = error_stage(error)
+    STAGE_ERRORS.inc(stage)
+    if isinstance(error, ServerBusyError):
+        return HTTPException(status_code=503, detail=str(error))
+    if isinstance(error, StageTimeoutError):
+        return HTTPException(status_code=504, detail=str(error))
+    if isinstance(error, StageError) and stage in config.UPSTREAM_STAGES:
+        return HTTPException(status_code=502, detail=str(error))
+    if isinstance(error, ValueError):
+        return HTTPException(status_code=400, detail=str(error))
+    return HTTPException(status_code=500, detail=f"An internal server error occurred: {error}")
+
 @router.post("/recommend", response_model=RecommendResponse)
-async def recommend_assessments(request: Request, query_request: QueryRequest):
+async def recommend_assessments(request: Request, response: Response, query_request: QueryRequest):
     try:
-        df_ref = getattr(request.app.state, 'dataframe', None)
-        retriever_ref = getattr(request.app.state, 'retriever', None)
-        chain_ref = getattr(request.app.state, 'structured_chain', None)
+        snapshot_ref = getattr(request.app.state, 'snapshot', None)
 
-        if df_ref is None or retriever_ref is None or chain_ref is None:
+        if snapshot_ref is None:
             raise HTTPException(status_code=503, detail="Service not ready, components not initialized.")
+        response.headers[config.CATALOG_VERSION_HEADER] = snapshot_ref.version
+        # Imported once a snapshot exists, so the import is already complete and never blocks the event loop.
+        from services import get_recommendations
 
-        recommendations: List[RecommendedAssessment] = await get_recommendations(
-            query=query_request.query,
-            df_ref=df_ref,
-            retriever_ref=retriever_ref,
-            structured_chain_ref=chain_ref
-        )
+        async with request_slot(getattr(request.app.state, 'request_limiter', None)):
+            recommendations: List[RecommendedAssessment] = await get_recommendations(
+                query=query_request.query,
+                snapshot_ref=snapshot_ref,
+                analysis_cache=getattr(request.app.state, 'analysis_cache', None),
+                semantic_cache=getattr(request.app.state, 'semantic_cache', None),
+                embedding_model_ref=getattr(request.app.state, 'embedding_model', None),
+                bypass_cache=query_request.bypass_cache,
+                batcher=getattr(request.app.state, 'retrieval_batcher', None)
+            )
         return RecommendResponse(recommended_assessments=recommendations)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+        raise pipeline_http_error(e)
+
+def stream_event_payload(event, phase_counts: Dict[str, int]) -> Dict[str, Any]:
+    if event.recommendation is not None:
+        phase_counts[event.phase] = phase_counts.get(event.phase, 0) + 1
+        return {
+            "event": "assessment",
+            "phase": event.phase,
+            "rank": event.rank,
+            "assessment": event.recommendation.model_dump(),
+        }
+    return {
+        "event": "phase_complete",
+        "phase": event.phase,
+        "count": phase_counts.get(event.phase, 0),
+        "final": event.phase != "raw",
+        "fallback": event.fallback,
+    }
+
+def format_stream_line(payload: Dict[str, Any], use_sse: bool) -> str:
+    if use_sse:
+        return f"event: {payload['event']}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps(payload) + "\n"
+
+@router.post("/recommend/stream")
+async def recommend_assessments_stream(
+    request: Request,
+    query_request: QueryRequest,
+    format: Optional[str] = None,
+    accept: Optional[str] = Header(None)
+):
+    snapshot_ref = getattr(request.app.state, 'snapshot', None)
+    if snapshot_ref is None:
+        raise HTTPException(status_code=503, detail="Service not ready, components not initialized.")
+    if format not in (None, "ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'.")
+    use_sse = format == "sse" or (format is None and "text/event-stream" in (accept or ""))
+    from services import stream_recommendations
+
+    async def event_lines():
+        phase_counts: Dict[str, int] = {}
+        try:
+            async with request_slot(getattr(request.app.state, 'request_limiter', None)):
+                async for event in stream_recommendations(
+                    query=query_request.query,
+                    snapshot_ref=snapshot_ref,
+                    analysis_cache=getattr(request.app.state, 'analysis_cache', None),
+                    semantic_cache=getattr(request.app.state, 'semantic_cache', None),
+                    embedding_model_ref=getattr(request.app.state, 'embedding_model', None),
+                    bypass_cache=query_request.bypass_cache,
+                    batcher=getattr(request.app.state, 'retrieval_batcher', None)
+                ):
+                    yield format_stream_line(stream_event_payload(event, phase_counts), use_sse)
+        except Exception as e:
+            # Headers are already sent, so failures are reported in-band.
+            error = pipeline_http_error(e)
+            yield format_stream_line({"event": "error", "status": error.status_code, "detail": error.detail}, use_sse)
+
+    return StreamingResponse(
+        event_lines(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={config.CATALOG_VERSION_HEADER: snapshot_ref.version, "Cache-Control": "no-cache"}
+    )
+
+@router.post("/recommend/batch", response_model=BatchRecommendResponse)
+async def recommend_assessments_batch(request: Request, response: Response, batch_request: BatchQueryRequest):
+    snapshot_ref = getattr(request.app.state, 'snapshot', None)
+    embedding_model_ref = getattr(request.app.state, 'embedding_model', None)
+    analysis_cache = getattr(request.app.state, 'analysis_cache', None)
+
+    if snapshot_ref is None or embedding_model_ref is None:
+        raise HTTPException(status_code=503, detail="Service not ready, components not initialized.")
+    if len(batch_request.queries) > config.BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {config.BATCH_MAX_QUERIES} queries.")
+    from services import get_batch_recommendations
+
+    async def run_chunk(chunk: List[str]) -> List[List[RecommendedAssessment]]:
+        return await get_batch_recommendations(
+            queries=chunk,
+            snapshot_ref=snapshot_ref,
+            embedding_model_ref=embedding_model_ref,
+            analysis_cache=analysis_cache
+        )
+
+    queries = batch_request.queries
+    request_limiter = getattr(request.app.state, 'request_limiter', None)
+
+    async def run_chunk_with_slot(chunk: List[str]) -> List[List[RecommendedAssessment]]:
+        # Each chunk holds a slot only while it runs, so a large batch cannot starve single queries.
+        async with request_slot(request_limiter):
+            return await run_chunk(chunk)
+
+    if batch_request.stream:
+        async def ndjson_lines():
+            for start in range(0, len(queries), config.BATCH_CHUNK_SIZE):
+                chunk = queries[start:start + config.BATCH_CHUNK_SIZE]
+                try:
+                    chunk_results = await run_chunk_with_slot(chunk)
+                except Exception as e:
+                    STAGE_ERRORS.inc(error_stage(e))
+                    for offset in range(len(chunk)):
+                        yield json.dumps({"index": start + offset, "error": str(e)}) + "\n"
+                    continue
+                for offset, recommendations in enumerate(chunk_results):
+                    line = {
+                        "index": start + offset,
+                        "recommended_assessments": [recommendation.model_dump() for recommendation in recommendations],
+                    }
+                    yield json.dumps(line) + "\n"
+
+        return StreamingResponse(
+            ndjson_lines(),
+            media_type="application/x-ndjson",
+            headers={config.CATALOG_VERSION_HEADER: snapshot_ref.version}
+        )
+
+    response.headers[config.CATALOG_VERSION_HEADER] = snapshot_ref.version
+    try:
+        batch_results: List[List[RecommendedAssessment]] = []
+        for start in range(0, len(queries), config.BATCH_CHUNK_SIZE):
+            batch_results.extend(await run_chunk_with_slot(queries[start:start + config.BATCH_CHUNK_SIZE]))
+        return BatchRecommendResponse(
+            results=[RecommendResponse(recommended_assessments=recommendations) for recommendations in batch_results]
+        )
+    except Exception as e:
+        raise pipeline_http_error(e)
 
 @router.get("/health")
 async def health_check(request: Request):
-    df_state = getattr(request.app.state, 'dataframe', None)
-    retriever_state = getattr(request.app.state, 'retriever', None)
-    chain_state = getattr(request.app.state, 'structured_chain', None)
+    snapshot_state = getattr(request.app.state, 'snapshot', None)
+    catalog_reloader = getattr(request.app.state, 'catalog_reloader', None)
 
     healthy = True
     details = []
 
-    if retriever_state is None:
+    if snapshot_state is None:
         healthy = False
-        details.append("Retriever not initialized")
-    if chain_state is None:
+        details.append("Catalog snapshot not initialized")
+    elif len(snapshot_state.catalog) == 0:
         healthy = False
-        details.append("Analysis chain not initialized")
-    if df_state is None or df_state.empty:
-        healthy = False
-        details.append("Dataframe not loaded or empty")
+        details.append("Catalog is empty")
 
     response_body = {"status": "healthy" if healthy else "unhealthy"}
     if not healthy:
         response_body["details"] = ", ".join(details)
+    if catalog_reloader is not None:
+        response_body["catalog"] = catalog_reloader.status()
+    elif snapshot_state is not None:
+        response_body["catalog"] = {"version": snapshot_state.version, "loaded_at": snapshot_state.loaded_at}
+
+    return response_body
+
+@router.get("/health/live")
+async def liveness_check():
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness_check(request: Request):
+    snapshot_state = getattr(request.app.state, 'snapshot', None)
+    catalog_reloader = getattr(request.app.state, 'catalog_reloader', None)
+    if snapshot_state is not None and len(snapshot_state.catalog) > 0:
+        return {"status": "ready", "catalog_version": snapshot_state.version}
 
-    return response_body
\ No newline at end of file
+    response_body = {"status": "starting"}
+    if catalog_reloader is not None:
+        catalog_status = catalog_reloader.status()
+        if not catalog_status["reloading"] and catalog_status["last_error"]:
+            response_body = {"status": "failed", "details": catalog_status["last_error"]}
+    elif snapshot_state is not None:
+        response_body = {"status": "failed", "details": "Catalog is empty"}
+    return JSONResponse(status_code=503, content=response_body)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    if not config.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/cache/stats")
+async def cache_stats(request: Request):
+    analysis_cache = getattr(request.app.state, 'analysis_cache', None)
+    semantic_cache = getattr(request.app.state, 'semantic_cache', None)
+    return {
+        "query_analysis": analysis_cache.stats() if analysis_cache is not None else None,
+        "semantic_results": semantic_cache.stats() if semantic_cache is not None else None,
+    }
+
+@router.get("/batching/stats")
+async def batching_stats(request: Request):
+    retrieval_batcher = getattr(request.app.state, 'retrieval_batcher', None)
+    return {"micro_batching": retrieval_batcher.stats() if retrieval_batcher is not None else None}
+
+@router.post("/admin/refresh-index")
+async def refresh_index(request: Request, wait: bool = True, x_admin_key: Optional[str] = Header(None)):
+    verify_admin_key(x_admin_key)
+    catalog_reloader = getattr(request.app.state, 'catalog_reloader', None)
+    if catalog_reloader is None:
+        raise HTTPException(status_code=503, detail="Service not ready, catalog reloader not initialized.")
+
+    if not wait:
+        if not catalog_reloader.start_background_reload():
+            raise HTTPException(status_code=409, detail="A catalog refresh is already in progress.")
+        return JSONResponse(status_code=202, content={"status": "reloading"})
+
+    try:
+        summary = await run_in_threadpool(catalog_reloader.reload)
+    except ReloadInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Catalog refresh failed: {e}")
+    return {"status": "refreshed", **summary}
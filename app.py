@@ -1,9 +1,11 @@
+import json
 import streamlit as st
 import requests
-from typing import List, Dict, Any, Optional
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 
 API_BASE_URL = "https://shl-recommender-ik0b.onrender.com/"
 RECOMMEND_ENDPOINT = f"{API_BASE_URL}/recommend"
+RECOMMEND_STREAM_ENDPOINT = f"{API_BASE_URL}/recommend/stream"
 HEALTH_ENDPOINT = f"{API_BASE_URL}/health"
 
 def check_backend_health() -> Dict[str, Any]:
@@ -53,6 +55,28 @@ def get_recommendations_from_api(query: str) -> Optional[List[Dict[str, Any]]]:
         st.error(f"An unexpected error occurred: {e}")
         return None
 
+def stream_recommendations_from_api(query: str) -> Iterator[Tuple[str, List[Dict[str, Any]], bool]]:
+    payload = {"query": query}
+    with requests.post(RECOMMEND_STREAM_ENDPOINT, json=payload, stream=True, timeout=60) as response:
+        if response.status_code == 404:
+            # Older backends have no streaming endpoint.
+            recommendations = get_recommendations_from_api(query)
+            if recommendations is not None:
+                yield "final", recommendations, True
+            return
+        response.raise_for_status()
+        phase_results: Dict[str, List[Dict[str, Any]]] = {}
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["event"] == "assessment":
+                phase_results.setdefault(event["phase"], []).append(event["assessment"])
+            elif event["event"] == "phase_complete":
+                yield event["phase"], phase_results.get(event["phase"], []), event["final"]
+            elif event["event"] == "error":
+                raise RuntimeError(event.get("detail", "The backend reported an error."))
+
 def display_recommendations(recommendations: List[Dict[str, Any]]):
     if not recommendations:
         st.info("No recommendations found for your query.")
@@ -134,10 +158,23 @@ if st.button("Find Recommendations"):
     if not query or query.isspace():
         st.warning("Please enter a query describing your assessment needs.")
     else:
-        with st.spinner("🧠 Analyzing query and searching for assessments..."):
-            recommendations = get_recommendations_from_api(query)
-        if recommendations is not None:
-            display_recommendations(recommendations)
+        status_placeholder = st.empty()
+        results_placeholder = st.empty()
+        status_placeholder.info("🧠 Searching for assessments...")
+        try:
+            for phase, recommendations, final in stream_recommendations_from_api(query):
+                with results_placeholder.container():
+                    display_recommendations(recommendations)
+                if final:
+                    status_placeholder.empty()
+                else:
+                    status_placeholder.info("🧠 Showing quick matches while the query is analyzed...")
+        except requests.exceptions.Timeout:
+            status_placeholder.error("Error: The request to the backend timed out. Please try again later.")
+        except requests.exceptions.ConnectionError:
+            status_placeholder.error("Error: Could not connect to the backend API.")
+        except Exception as e:
+            status_placeholder.error(f"Error fetching recommendations: {e}")
 
 st.markdown("---")
 st.caption("Powered by FastAPI, Langchain, and Streamlit.")
\ No newline at end of file
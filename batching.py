@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+import config
+from concurrency import StageError, StageTimeoutError, run_blocking
+from metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+class PendingItem(NamedTuple):
+    embedding_model: Any
+    vectorstore: Optional[Any]
+    text: str
+    k: int
+    allowed_row_ids: Optional[np.ndarray]
+    future: "asyncio.Future"
+    enqueued_at: float
+
+class BatchedHits(NamedTuple):
+    hits: List[Any]
+    embedding_seconds: float
+    search_seconds: float
+
+class RetrievalBatcher:
+    def __init__(
+        self,
+        window_ms: float = config.MICRO_BATCH_WINDOW_MS,
+        max_batch_size: int = config.MICRO_BATCH_MAX_SIZE
+    ):
+        self.window_seconds = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight: set = set()
+
+        self.batches = 0
+        self.items = 0
+        self.max_realized_batch_size = 0
+        self.queue_delay_sum = 0.0
+        self.queue_delay_max = 0.0
+        self.batch_size_buckets = {bound: 0 for bound in config.MICRO_BATCH_SIZE_BUCKETS}
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._collect_batches())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _submit(
+        self,
+        embedding_model: Any,
+        vectorstore: Optional[Any],
+        text: str,
+        k: int,
+        allowed_row_ids: Optional[np.ndarray] = None
+    ) -> Any:
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(PendingItem(embedding_model, vectorstore, text, k, allowed_row_ids, future, time.perf_counter()))
+        return await future
+
+    async def embed(self, embedding_model: Any, text: str) -> List[float]:
+        return await self._submit(embedding_model, None, text, 0)
+
+    async def retrieve(self, vectorstore: Any, text: str, k: int, allowed_row_ids: Optional[np.ndarray] = None) -> BatchedHits:
+        return await self._submit(vectorstore.embedding_function, vectorstore, text, k, allowed_row_ids)
+
+    async def _collect_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window_seconds
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._process_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    def _record_batch(self, batch: List[PendingItem]) -> None:
+        now = time.perf_counter()
+        self.batches += 1
+        self.items += len(batch)
+        self.max_realized_batch_size = max(self.max_realized_batch_size, len(batch))
+        for bound in self.batch_size_buckets:
+            if len(batch) <= bound:
+                self.batch_size_buckets[bound] += 1
+        for item in batch:
+            delay = now - item.enqueued_at
+            self.queue_delay_sum += delay
+            self.queue_delay_max = max(self.queue_delay_max, delay)
+
+    async def _embed_batch(self, items: List[PendingItem]) -> np.ndarray:
+        from retrieval import embed_search_queries
+
+        started = time.perf_counter()
+        try:
+            vectors = await run_blocking(
+                embed_search_queries, items[0].embedding_model, [item.text for item in items],
+                timeout=config.EMBEDDING_TIMEOUT_SECONDS, stage="embedding"
+            )
+        except (StageError, StageTimeoutError):
+            raise
+        except Exception as e:
+            # Callers only see the future's exception, so keep the failing stage attached.
+            raise StageError("embedding", e) from e
+        STAGE_SECONDS.observe(time.perf_counter() - started, "batch_embedding")
+        return vectors
+
+    async def _process_batch(self, batch: List[PendingItem]) -> None:
+        self._record_batch(batch)
+        live_items = [item for item in batch if not item.future.done()]
+
+        by_embedding_model: Dict[int, List[PendingItem]] = defaultdict(list)
+        for item in live_items:
+            by_embedding_model[id(item.embedding_model)].append(item)
+
+        for items in by_embedding_model.values():
+            try:
+                vectors = await self._embed_batch(items)
+                await self._resolve(items, vectors, time.perf_counter())
+            except Exception as e:
+                logger.warning("Micro-batch of %d items failed: %s", len(items), e)
+                for item in items:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+
+    async def _resolve(self, items: List[PendingItem], vectors: np.ndarray, embedded_at: float) -> None:
+        from retrieval import search_vectors
+
+        by_search: Dict[tuple, List[int]] = defaultdict(list)
+        for position, item in enumerate(items):
+            if item.vectorstore is None:
+                if not item.future.done():
+                    item.future.set_result(vectors[position].tolist())
+            else:
+                # Filtered searches carry their own id selector, so only unfiltered ones share a search call.
+                filter_key = None if item.allowed_row_ids is None else id(item)
+                by_search[(id(item.vectorstore), item.k, filter_key)].append(position)
+
+        for positions in by_search.values():
+            first = items[positions[0]]
+            started = time.perf_counter()
+            try:
+                search_results = await run_blocking(
+                    search_vectors, first.vectorstore, vectors[positions], first.k, first.allowed_row_ids,
+                    timeout=config.RETRIEVAL_TIMEOUT_SECONDS, stage="retrieval"
+                )
+            except (StageError, StageTimeoutError):
+                raise
+            except Exception as e:
+                raise StageError("retrieval", e) from e
+            searched_at = time.perf_counter()
+            STAGE_SECONDS.observe(searched_at - started, "batch_search")
+            for position, hits in zip(positions, search_results):
+                item = items[position]
+                if not item.future.done():
+                    # Per-item timings let callers split their wait into embedding (queueing included) and search.
+                    item.future.set_result(BatchedHits(hits, embedded_at - item.enqueued_at, searched_at - embedded_at))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_ms": self.window_seconds * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": (self.items / self.batches) if self.batches else None,
+            "max_realized_batch_size": self.max_realized_batch_size,
+            "queue_delay_mean_ms": (self.queue_delay_sum / self.items * 1000.0) if self.items else None,
+            "queue_delay_max_ms": self.queue_delay_max * 1000.0,
+            "batch_size_buckets": {f"le_{bound}": count for bound, count in self.batch_size_buckets.items()},
+        }
+
+def create_retrieval_batcher() -> Optional[RetrievalBatcher]:
+    if not config.MICRO_BATCH_ENABLED:
+        return None
+    return RetrievalBatcher()
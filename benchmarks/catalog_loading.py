@@ -0,0 +1,84 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config
+from services import iter_documents, load_catalog_dataframe
+
+DEFAULT_SIZES = [1_000, 10_000, 50_000, 100_000, 200_000]
+
+def synthesize_catalog(base_df: pd.DataFrame, num_rows: int) -> pd.DataFrame:
+    repeats = -(-num_rows // len(base_df))
+    synthetic_df = pd.concat([base_df] * repeats, ignore_index=True).iloc[:num_rows].copy()
+    url_col = config.JSON_FIELD_TO_CSV_COL["url"]
+    synthetic_df[url_col] = synthetic_df[url_col].astype(str) + "?copy=" + (synthetic_df.index // len(base_df)).astype(str)
+    return synthetic_df
+
+def write_catalog(catalog_df: pd.DataFrame, directory: Path, file_format: str) -> Path:
+    path = directory / f"catalog.{file_format}"
+    if file_format == "parquet":
+        catalog_df.to_parquet(path, index=False)
+    elif file_format == "arrow":
+        catalog_df.to_feather(path)
+    else:
+        catalog_df.to_csv(path, index=False)
+    return path
+
+def measure(path: Path) -> Dict[str, float]:
+    started = time.perf_counter()
+    local_df = load_catalog_dataframe(path)
+    loaded = time.perf_counter()
+    num_docs = sum(len(docs) for _, docs in iter_documents(local_df))
+    finished = time.perf_counter()
+    return {
+        "rows": num_docs,
+        "load_seconds": loaded - started,
+        "documents_seconds": finished - loaded,
+        "total_seconds": finished - started,
+        "us_per_row": (finished - started) / max(num_docs, 1) * 1e6,
+    }
+
+def scaling_exponent(results: List[Dict[str, float]]) -> float:
+    rows = np.log([result["rows"] for result in results])
+    seconds = np.log([result["total_seconds"] for result in results])
+    return float(np.polyfit(rows, seconds, 1)[0])
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure catalog loading and document construction at increasing catalog sizes.")
+    parser.add_argument("--csv", type=Path, default=config.CSV_FILE_PATH, help="Catalog used as the template for synthetic rows.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Catalog sizes to measure.")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default="csv", help="On-disk format of the synthetic catalog.")
+    parser.add_argument("--max-exponent", type=float, default=1.2, help="Fail if time grows faster than rows^exponent.")
+    args = parser.parse_args(argv)
+
+    base_df = pd.read_csv(args.csv)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_rows in sorted(args.sizes):
+            path = write_catalog(synthesize_catalog(base_df, num_rows), Path(tmp_dir), args.format)
+            result = measure(path)
+            results.append(result)
+            print(
+                f"{result['rows']:>9} rows  load {result['load_seconds']:7.3f}s  "
+                f"documents {result['documents_seconds']:7.3f}s  {result['us_per_row']:7.2f} us/row",
+                file=sys.stderr
+            )
+
+    exponent = scaling_exponent(results) if len(results) > 1 else 1.0
+    print(json.dumps({"format": args.format, "scaling_exponent": exponent, "results": results}, indent=2))
+    if exponent > args.max_exponent:
+        print(f"Scaling exponent {exponent:.2f} exceeds {args.max_exponent:.2f}.", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
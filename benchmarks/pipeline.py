@@ -0,0 +1,410 @@
+import argparse
+import asyncio
+import json
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from langchain_core.runnables import RunnableLambda
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config
+from ann_index import build_ann_index, configure_index_search
+from catalog_loading import synthesize_catalog, write_catalog
+from embeddings import HashingEmbeddings
+from models import AssessmentSearchCriteria
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_QUERIES_PATH = REPO_DIR / "requests.jsonl"
+DEFAULT_CONCURRENCY = [1, 4, 16, 64]
+DEFAULT_SCALE_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_ANN_INDEX_TYPES = ["ivf_flat", "ivf_pq", "hnsw"]
+DEFAULT_NPROBES = [1, 4, 16, 64]
+DEFAULT_EF_SEARCH = [16, 64, 256]
+RECALL_K = 10
+SUITES = ["pipeline", "endpoint", "scaling"]
+QUERY_PATTERN = re.compile(r"Query: ```(.*?)```", re.S)
+DURATION_PATTERN = re.compile(r"(\d+)\s*(?:min|minute)")
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9#+.-]*")
+STOPWORDS = {
+    "and", "are", "for", "from", "have", "into", "that", "the", "them", "then", "there", "this",
+    "want", "what", "when", "which", "with", "would", "your", "need", "looking", "should",
+}
+
+class LatencyEmbeddings(HashingEmbeddings):
+    def __init__(self, latency_seconds: float = 0.0, dimension: int = config.HASHING_EMBEDDING_DIM):
+        super().__init__(dimension)
+        self.latency_seconds = latency_seconds
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return super().embed_query(text)
+
+def offline_analysis(query: str) -> AssessmentSearchCriteria:
+    lowered = query.lower()
+    words = [word for word in WORD_PATTERN.findall(lowered) if len(word) > 3 and word not in STOPWORDS]
+    duration = DURATION_PATTERN.search(lowered)
+    return AssessmentSearchCriteria(
+        job_role=" ".join(words[:2]) or None,
+        key_skills_or_concepts=words[2:7] or None,
+        max_duration_minutes=int(duration.group(1)) if duration else None
+    )
+
+def prompt_query(prompt_value: Any) -> str:
+    text = prompt_value.to_string() if hasattr(prompt_value, "to_string") else str(prompt_value)
+    match = QUERY_PATTERN.search(text)
+    return match.group(1) if match else text
+
+class OfflineChatModel:
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+
+    def with_structured_output(self, schema: Any) -> RunnableLambda:
+        def analyze(prompt_value: Any) -> AssessmentSearchCriteria:
+            time.sleep(self.latency_seconds)
+            return offline_analysis(prompt_query(prompt_value))
+
+        async def analyze_async(prompt_value: Any) -> AssessmentSearchCriteria:
+            await asyncio.sleep(self.latency_seconds)
+            return offline_analysis(prompt_query(prompt_value))
+
+        return RunnableLambda(analyze, afunc=analyze_async)
+
+def load_queries(path: Path, fallback_df: pd.DataFrame) -> List[str]:
+    if path.exists():
+        queries = []
+        for line in path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                line = record.get("query") or record.get("title") or ""
+            if line:
+                queries.append(line)
+        if queries:
+            return queries
+    name_col = config.JSON_FIELD_TO_CSV_COL.get("assessment_name", "Assessment Name")
+    return fallback_df[name_col].dropna().astype(str).tolist()
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def summarize_latencies(latencies: List[float], wall_seconds: float, concurrency: int, errors: int) -> Dict[str, Any]:
+    latencies_ms = np.asarray(latencies, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99]) if latencies_ms.size else (None, None, None)
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "mean_ms": float(latencies_ms.mean()) if latencies_ms.size else None,
+        "throughput_rps": len(latencies) / wall_seconds if wall_seconds > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+async def run_load(
+    call: Callable[[str], Awaitable[Any]],
+    queries: List[str],
+    concurrency: int,
+    num_requests: int
+) -> Dict[str, Any]:
+    slots = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(query: str) -> None:
+        nonlocal errors
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await call(query)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(queries[position % len(queries)]) for position in range(num_requests)))
+    return summarize_latencies(latencies, time.perf_counter() - started, concurrency, errors)
+
+def measure_startup(csv_path: Path, index_dir: Path, embedding_model: Any, llm: Any) -> Dict[str, Any]:
+    import services
+
+    results = {}
+    for phase in ("cold", "warm"):
+        started = time.perf_counter()
+        local_df = services.load_catalog_dataframe(csv_path)
+        local_vectorstore = services.load_or_build_vectorstore(local_df, embedding_model, csv_path, index_dir=index_dir)
+        local_snapshot = services.build_snapshot(local_df, local_vectorstore, llm, services.catalog_version(csv_path))
+        results[f"{phase}_seconds"] = time.perf_counter() - started
+    results["rows"] = len(local_snapshot.catalog)
+    results["peak_rss_mb"] = peak_rss_mb()
+    return {"startup": results, "snapshot": local_snapshot}
+
+async def bench_pipeline(snapshot: Any, queries: List[str], levels: List[int], num_requests: int) -> List[Dict[str, Any]]:
+    from batching import create_retrieval_batcher
+    from services import get_recommendations
+
+    results = []
+    for concurrency in levels:
+        batcher = create_retrieval_batcher()
+        results.append(await run_load(
+            lambda query: get_recommendations(query, snapshot, batcher=batcher),
+            queries, concurrency, num_requests
+        ))
+        if batcher is not None:
+            await batcher.stop()
+    return results
+
+async def bench_endpoint(
+    snapshot: Any,
+    embedding_model: Any,
+    llm: Any,
+    queries: List[str],
+    levels: List[int],
+    num_requests: int
+) -> List[Dict[str, Any]]:
+    import httpx
+
+    from batching import create_retrieval_batcher
+    from concurrency import create_request_limiter
+    from main import app
+
+    app.state.snapshot = snapshot
+    app.state.embedding_model = embedding_model
+    app.state.llm = llm
+    app.state.analysis_cache = None
+    app.state.semantic_cache = None
+    app.state.catalog_reloader = None
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for concurrency in levels:
+            app.state.request_limiter = create_request_limiter()
+            app.state.retrieval_batcher = create_retrieval_batcher()
+
+            async def call(query: str) -> None:
+                response = await client.post("/recommend", json={"query": query, "bypass_cache": True})
+                response.raise_for_status()
+
+            results.append(await run_load(call, queries, concurrency, num_requests))
+            if app.state.retrieval_batcher is not None:
+                await app.state.retrieval_batcher.stop()
+    return results
+
+def diversify_catalog(catalog_df: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    # Copies of a template row would embed to identical vectors and make recall meaningless, so each row gets sampled vocabulary.
+    description_col = config.JSON_FIELD_TO_CSV_COL["description"]
+    descriptions = catalog_df[description_col].fillna("").astype(str)
+    vocabulary = np.asarray(sorted({word for text in descriptions.unique() for word in text.split()}) or ["assessment"])
+    sampled = vocabulary[np.random.default_rng(seed).integers(0, len(vocabulary), size=(len(catalog_df), 6))]
+    catalog_df[description_col] = descriptions + " " + pd.Series([" ".join(words) for words in sampled], index=catalog_df.index)
+    return catalog_df
+
+def recall_at_k(exact_positions: np.ndarray, approximate_positions: np.ndarray) -> float:
+    recalls = []
+    for exact_row, approximate_row in zip(exact_positions, approximate_positions):
+        expected = set(exact_row[exact_row >= 0].tolist())
+        if expected:
+            recalls.append(len(expected & set(approximate_row.tolist())) / len(expected))
+    return float(np.mean(recalls)) if recalls else 0.0
+
+def index_size_bytes(index: Any) -> int:
+    import faiss
+
+    return int(faiss.serialize_index(index).size)
+
+def bench_ann_indexes(
+    exact_index: Any,
+    query_vectors: np.ndarray,
+    index_types: List[str],
+    nprobes: List[int],
+    ef_searches: List[int],
+    min_vectors: int
+) -> List[Dict[str, Any]]:
+    _, exact_positions = exact_index.search(query_vectors, RECALL_K)
+    results = []
+    for index_type in index_types:
+        started = time.perf_counter()
+        ann_index = build_ann_index(exact_index, index_type, min_vectors=min_vectors)
+        build_seconds = time.perf_counter() - started
+        if index_type == "hnsw":
+            sweep = [{"ef_search": ef_search} for ef_search in ef_searches]
+        elif index_type.startswith("ivf"):
+            sweep = [{"nprobe": nprobe} for nprobe in nprobes]
+        else:
+            sweep = [{}]
+
+        points = []
+        for search_settings in sweep:
+            configure_index_search(
+                ann_index,
+                nprobe=search_settings.get("nprobe", config.FAISS_IVF_NPROBE),
+                ef_search=search_settings.get("ef_search", config.FAISS_HNSW_EF_SEARCH)
+            )
+            searched = time.perf_counter()
+            _, approximate_positions = ann_index.search(query_vectors, RECALL_K)
+            points.append({
+                **search_settings,
+                "search_ms_per_query": (time.perf_counter() - searched) / len(query_vectors) * 1000.0,
+                f"recall_at_{RECALL_K}": recall_at_k(exact_positions, approximate_positions),
+            })
+        results.append({
+            "index_type": index_type,
+            "index_class": type(ann_index).__name__,
+            "build_seconds": build_seconds,
+            "index_bytes": index_size_bytes(ann_index),
+            "sweep": points,
+        })
+        print(
+            f"{'':>9}       {index_type:<8} build {build_seconds:8.2f}s  "
+            + "  ".join(f"recall {point[f'recall_at_{RECALL_K}']:.3f} @ {point['search_ms_per_query']:.3f} ms" for point in points),
+            file=sys.stderr
+        )
+        del ann_index
+    return results
+
+def bench_scaling(
+    base_df: pd.DataFrame,
+    queries: List[str],
+    sizes: List[int],
+    dimension: int,
+    index_types: List[str],
+    nprobes: List[int],
+    ef_searches: List[int],
+    min_vectors: int
+) -> List[Dict[str, Any]]:
+    import services
+    from index_store import serving_vectorstore
+    from retrieval import embed_search_queries, search_vectors
+
+    embedding_model = HashingEmbeddings(dimension)
+    name_col = config.JSON_FIELD_TO_CSV_COL.get("assessment_name", "Assessment Name")
+    recall_queries = queries + base_df[name_col].dropna().astype(str).tolist()
+    query_vectors = embed_search_queries(embedding_model, recall_queries)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_rows in sorted(sizes):
+            path = write_catalog(diversify_catalog(synthesize_catalog(base_df, num_rows)), Path(tmp_dir), "csv")
+            started = time.perf_counter()
+            local_df = services.load_catalog_dataframe(path)
+            loaded = time.perf_counter()
+            local_vectorstore = serving_vectorstore(services.build_full_vectorstore(local_df, embedding_model)[0])
+            indexed = time.perf_counter()
+            search_vectors(local_vectorstore, query_vectors, config.NUM_DOCS_TO_RETRIEVE)
+            searched = time.perf_counter()
+            results.append({
+                "rows": len(local_df),
+                "load_seconds": loaded - started,
+                "index_seconds": indexed - loaded,
+                "search_ms_per_query": (searched - indexed) / len(recall_queries) * 1000.0,
+                "index_bytes": index_size_bytes(local_vectorstore.index),
+            })
+            print(
+                f"{num_rows:>9} rows  exact    index {indexed - loaded:8.2f}s  "
+                f"search {results[-1]['search_ms_per_query']:8.3f} ms/query",
+                file=sys.stderr
+            )
+            results[-1]["ann_indexes"] = bench_ann_indexes(
+                local_vectorstore.index, query_vectors, index_types, nprobes, ef_searches, min_vectors
+            )
+            results[-1]["peak_rss_mb"] = peak_rss_mb()
+            del local_df, local_vectorstore
+    return results
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    config.EMBEDDING_PROVIDER = "hashing"
+    embedding_model = LatencyEmbeddings(args.embedding_latency_ms / 1000.0)
+    llm = OfflineChatModel(args.llm_latency_ms / 1000.0)
+    base_df = pd.read_csv(args.csv)
+    queries = load_queries(args.queries, base_df)
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "queries": len(queries),
+            "requests_per_level": args.requests,
+            "llm_latency_ms": args.llm_latency_ms,
+            "embedding_latency_ms": args.embedding_latency_ms,
+            "parallel_retrieval": config.PARALLEL_RETRIEVAL_ENABLED,
+            "micro_batching": config.MICRO_BATCH_ENABLED,
+        }
+    }
+
+    if "pipeline" in args.suites or "endpoint" in args.suites:
+        with tempfile.TemporaryDirectory() as index_dir:
+            startup = measure_startup(args.csv, Path(index_dir), embedding_model, llm)
+            report["startup"] = startup["startup"]
+            if "pipeline" in args.suites:
+                report["pipeline"] = await bench_pipeline(startup["snapshot"], queries, args.concurrency, args.requests)
+            if "endpoint" in args.suites:
+                report["endpoint"] = await bench_endpoint(
+                    startup["snapshot"], embedding_model, llm, queries, args.concurrency, args.requests
+                )
+    if "scaling" in args.suites:
+        report["scaling"] = bench_scaling(
+            base_df, queries, args.scale_sizes, args.scale_dimension,
+            args.index_types, args.nprobe, args.ef_search, args.ann_min_vectors
+        )
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation pipeline offline with deterministic LLM and embedding stand-ins.")
+    parser.add_argument("--csv", type=Path, default=config.CSV_FILE_PATH, help="Catalog used for the pipeline runs and as the template for synthetic catalogs.")
+    parser.add_argument("--queries", type=Path, default=DEFAULT_QUERIES_PATH, help="Query corpus: JSONL with a 'query' or 'title' field, or one query per line.")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=SUITES, help="Which benchmarks to run.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY, help="Concurrency levels for the latency runs.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests issued at each concurrency level.")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="Latency injected into every query analysis call.")
+    parser.add_argument("--embedding-latency-ms", type=float, default=50.0, help="Latency injected into every embedding call.")
+    parser.add_argument("--scale-sizes", type=int, nargs="+", default=DEFAULT_SCALE_SIZES, help="Synthetic catalog sizes for the scaling run (up to 1000000).")
+    parser.add_argument("--scale-dimension", type=int, default=256, help="Embedding dimension used for the scaling run.")
+    parser.add_argument("--index-types", nargs="*", choices=config.FAISS_INDEX_TYPES, default=DEFAULT_ANN_INDEX_TYPES, help="Index types compared against the exact index in the scaling run.")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=DEFAULT_NPROBES, help="IVF lists probed per query; each value is measured.")
+    parser.add_argument("--ef-search", type=int, nargs="+", default=DEFAULT_EF_SEARCH, help="HNSW search breadth; each value is measured.")
+    parser.add_argument("--ann-min-vectors", type=int, default=0, help="Catalogs smaller than this keep the exact index (the service uses config.FAISS_ANN_MIN_VECTORS).")
+    parser.add_argument("--output", type=Path, default=None, help="Write the JSON report here as well as to stdout.")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_benchmarks(args))
+    rendered = json.dumps(report, indent=2, default=float)
+    if args.output is not None:
+        args.output.write_text(rendered + "\n", encoding="utf-8")
+    print(rendered)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import config
+from embeddings import create_embedding_model
+from index_store import build_manifest, load_components, manifest_matches, read_manifest, save_components
+from services import build_shared_components, load_catalog_dataframe, load_or_build_vectorstore
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Prebuild the FAISS index artifact for the assessment catalog.")
+    parser.add_argument("--csv", type=Path, default=config.CSV_FILE_PATH, help="Catalog CSV to index.")
+    parser.add_argument("--index-dir", type=Path, default=config.INDEX_DIR, help="Directory the artifact is written to.")
+    parser.add_argument("--provider", choices=config.EMBEDDING_PROVIDERS, default=None, help="Embedding provider (defaults to config.EMBEDDING_PROVIDER).")
+    parser.add_argument("--index-type", choices=config.FAISS_INDEX_TYPES, default=None, help="FAISS index type (defaults to config.FAISS_INDEX_TYPE).")
+    parser.add_argument("--force", action="store_true", help="Re-embed the whole catalog instead of reusing unchanged rows from the existing artifact.")
+    parser.add_argument("--shared", action="store_true", default=config.SHARED_INDEX_ENABLED, help="Also write the memory-mapped catalog, lexical and facet files used by SHARED_INDEX_ENABLED workers.")
+    args = parser.parse_args(argv)
+    config.validate_mappings()
+    if args.provider:
+        config.EMBEDDING_PROVIDER = args.provider
+    if args.index_type:
+        config.FAISS_INDEX_TYPE = args.index_type
+
+    try:
+        manifest = build_manifest(args.csv)
+        up_to_date = manifest_matches(read_manifest(args.index_dir), manifest)
+        if args.shared:
+            up_to_date = up_to_date and load_components(args.index_dir, manifest) is not None
+        if not args.force and up_to_date:
+            print(f"Index artifact in {args.index_dir} is up to date.")
+            return 0
+
+        start = time.perf_counter()
+        local_df = load_catalog_dataframe(args.csv)
+        embedding_model = create_embedding_model()
+        built_vectorstore = load_or_build_vectorstore(
+            local_df, embedding_model, args.csv, index_dir=args.index_dir, force_rebuild=args.force
+        )
+        if args.shared:
+            save_components(args.index_dir, manifest, build_shared_components(local_df))
+        elapsed = time.perf_counter() - start
+        print(f"Built {config.FAISS_INDEX_TYPE} index with {built_vectorstore.index.ntotal} vectors in {elapsed:.1f}s -> {args.index_dir}")
+        return 0
+    except Exception as e:
+        print(f"Failed to build index artifact: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import config
+from models import AssessmentSearchCriteria, RecommendedAssessment
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+class QueryAnalysisCache:
+    def __init__(
+        self,
+        max_entries: int = config.ANALYSIS_CACHE_MAX_ENTRIES,
+        ttl_seconds: Optional[float] = config.ANALYSIS_CACHE_TTL_SECONDS,
+        db_path: Optional[Path] = config.ANALYSIS_CACHE_DB_PATH,
+        model_name: str = config.LLM_MODEL_NAME
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.model_name = model_name
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_executor: Optional[ThreadPoolExecutor] = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if db_path is not None:
+            self._open_db(Path(db_path))
+
+    def _open_db(self, db_path: Path) -> None:
+        try:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_analysis ("
+                "cache_key TEXT PRIMARY KEY, created_at REAL NOT NULL, criteria TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS query_analysis_created_at ON query_analysis (created_at)")
+            # SQLite reads and writes run on one dedicated thread, off the event loop and in order.
+            self._disk_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis-cache-disk")
+        except sqlite3.Error as e:
+            logger.warning("Query analysis disk cache disabled (%s): %s", db_path, e)
+            self._db = None
+
+    def make_key(self, query: str, namespace: Optional[str] = None) -> str:
+        raw_key = f"{self.model_name}\x1f{namespace or ''}\x1f{normalize_query(query)}"
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, created_at: float, criteria: Dict[str, Any]) -> None:
+        self._entries[key] = (created_at, criteria)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT created_at, criteria FROM query_analysis WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self._is_expired(row[0], now):
+                self._db.execute("DELETE FROM query_analysis WHERE cache_key = ?", (key,))
+                return None
+            return row[0], json.loads(row[1])
+        except (sqlite3.Error, ValueError):
+            return None
+
+    async def get(self, query: str, namespace: Optional[str] = None) -> Optional[AssessmentSearchCriteria]:
+        key = self.make_key(query, namespace)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[0], now):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return AssessmentSearchCriteria(**entry[1])
+            if self._disk_executor is None:
+                self.misses += 1
+                return None
+
+        entry = await asyncio.get_running_loop().run_in_executor(self._disk_executor, self._read_disk, key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry[0], entry[1])
+            self.hits += 1
+            self.disk_hits += 1
+        return AssessmentSearchCriteria(**entry[1])
+
+    def _write_disk(self, key: str, created_at: float, criteria_text: str) -> None:
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO query_analysis (cache_key, created_at, criteria) VALUES (?, ?, ?)",
+                (key, created_at, criteria_text)
+            )
+            if self.ttl_seconds is not None:
+                self._db.execute("DELETE FROM query_analysis WHERE created_at < ?", (created_at - self.ttl_seconds,))
+        except sqlite3.Error:
+            pass
+
+    def put(self, query: str, criteria: AssessmentSearchCriteria, namespace: Optional[str] = None) -> None:
+        key = self.make_key(query, namespace)
+        now = time.time()
+        criteria_data = criteria.model_dump()
+        with self._lock:
+            self._remember(key, now, criteria_data)
+        if self._disk_executor is not None:
+            # Write-through happens in the background; the memory tier already serves the entry.
+            self._disk_executor.submit(self._write_disk, key, now, json.dumps(criteria_data))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "disk_tier": self._disk_executor is not None,
+            }
+
+class SemanticResultCache:
+    def __init__(
+        self,
+        max_entries: int = config.SEMANTIC_CACHE_MAX_ENTRIES,
+        similarity_threshold: float = config.SEMANTIC_CACHE_SIMILARITY_THRESHOLD,
+        ttl_seconds: Optional[float] = config.SEMANTIC_CACHE_TTL_SECONDS
+    ):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._created_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._results: List[Optional[List[Dict[str, Any]]]] = [None] * max_entries
+        self._namespaces = np.full(max_entries, None, dtype=object)
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.hit_similarity_sum = 0.0
+        self.hit_similarity_min: Optional[float] = None
+        self.hit_similarity_buckets = {bound: 0 for bound in config.SEMANTIC_CACHE_SIMILARITY_BUCKETS}
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _record_hit(self, similarity: float) -> None:
+        self.hits += 1
+        self.hit_similarity_sum += similarity
+        if self.hit_similarity_min is None or similarity < self.hit_similarity_min:
+            self.hit_similarity_min = similarity
+        for bound in self.hit_similarity_buckets:
+            if similarity <= bound:
+                self.hit_similarity_buckets[bound] += 1
+
+    def lookup(self, embedding: Sequence[float], namespace: Optional[str] = None) -> Optional[Tuple[List[RecommendedAssessment], float]]:
+        query_vector = self._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            if self._size == 0 or self._vectors is None or self._vectors.shape[1] != query_vector.shape[0]:
+                self.misses += 1
+                return None
+
+            similarities = self._vectors[:self._size] @ query_vector
+            if self.ttl_seconds is not None:
+                expired = now - self._created_at[:self._size] > self.ttl_seconds
+                similarities[expired] = -np.inf
+            # Entries stored by requests that ran against another catalog version never match.
+            similarities[self._namespaces[:self._size] != namespace] = -np.inf
+            best_slot = int(np.argmax(similarities))
+            best_similarity = float(similarities[best_slot])
+            if best_similarity < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            self._last_used[best_slot] = now
+            self._record_hit(best_similarity)
+            cached_results = self._results[best_slot]
+        return [RecommendedAssessment(**item) for item in cached_results], best_similarity
+
+    def store(self, embedding: Sequence[float], recommendations: List[RecommendedAssessment], namespace: Optional[str] = None) -> None:
+        vector = self._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                self._size = 0
+
+            duplicate_slot = None
+            if self._size > 0:
+                similarities = self._vectors[:self._size] @ vector
+                similarities[self._namespaces[:self._size] != namespace] = -np.inf
+                best_slot = int(np.argmax(similarities))
+                if similarities[best_slot] >= self.similarity_threshold:
+                    duplicate_slot = best_slot
+
+            if duplicate_slot is not None:
+                slot = duplicate_slot
+            elif self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(np.argmin(self._last_used[:self._size]))
+                self.evictions += 1
+
+            self._vectors[slot] = vector
+            self._created_at[slot] = now
+            self._last_used[slot] = now
+            self._results[slot] = [recommendation.model_dump() for recommendation in recommendations]
+            self._namespaces[slot] = namespace
+
+    def clear(self) -> None:
+        with self._lock:
+            self._size = 0
+            self._results = [None] * self.max_entries
+            self._namespaces[:] = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "similarity_threshold": self.similarity_threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "hit_similarity_mean": (self.hit_similarity_sum / self.hits) if self.hits else None,
+                "hit_similarity_min": self.hit_similarity_min,
+                "hit_similarity_buckets": {f"le_{bound}": count for bound, count in self.hit_similarity_buckets.items()},
+            }
+
+def create_analysis_cache() -> Optional[QueryAnalysisCache]:
+    if not config.ANALYSIS_CACHE_ENABLED:
+        return None
+    return QueryAnalysisCache()
+
+
+def create_semantic_cache() -> Optional[SemanticResultCache]:
+    if not config.SEMANTIC_CACHE_ENABLED:
+        return None
+    return SemanticResultCache()
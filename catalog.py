@@ -0,0 +1,151 @@
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+from models import RecommendedAssessment
+
+RESPONSE_FIELDS = [field for field in config.TARGET_JSON_FIELDS if field in RecommendedAssessment.model_fields]
+
+def intern_values(values: Sequence) -> np.ndarray:
+    interned = np.empty(len(values), dtype=object)
+    interned[:] = [sys.intern(value) if isinstance(value, str) else None for value in values]
+    return interned
+
+def encode_text_values(values: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [value.encode("utf-8") if isinstance(value, str) else b"" for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(item) for item in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+class CategoricalColumn:
+    __slots__ = ("codes", "labels")
+
+    def __init__(self, codes: np.ndarray, labels: Sequence):
+        self.codes = codes
+        # Missing values have code -1, which lands on the trailing None label.
+        self.labels = intern_values(list(labels) + [None])
+
+    @classmethod
+    def from_series(cls, values: pd.Series) -> "CategoricalColumn":
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        return cls(codes.astype(np.int32), [str(label) for label in uniques])
+
+    def take(self, positions: np.ndarray) -> np.ndarray:
+        return self.labels[self.codes[positions]]
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        return {"codes": self.codes}, {"kind": "categorical", "labels": self.labels[:-1].tolist()}
+
+class TextColumn:
+    __slots__ = ("values",)
+
+    def __init__(self, values: pd.Series):
+        self.values = intern_values(values.where(values.notna(), None).tolist())
+
+    def take(self, positions: np.ndarray) -> np.ndarray:
+        return self.values[positions]
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        blob, offsets = encode_text_values(self.values)
+        return {"blob": blob, "offsets": offsets}, {"kind": "text"}
+
+class MappedTextColumn:
+    __slots__ = ("blob", "offsets")
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def take(self, positions: np.ndarray) -> np.ndarray:
+        values = np.empty(positions.shape[0], dtype=object)
+        starts = self.offsets[positions]
+        ends = self.offsets[positions + 1]
+        for offset, (start, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+            values[offset] = self.blob[start:end].tobytes().decode("utf-8")
+        return values
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        return {"blob": self.blob, "offsets": self.offsets}, {"kind": "text"}
+
+class CatalogStore:
+    __slots__ = ("row_ids", "row_lookup", "durations", "columns")
+
+    def __init__(self, row_ids: np.ndarray, durations: np.ndarray, columns: Dict[str, Any]):
+        self.row_ids = row_ids
+        self.row_lookup = pd.Index(np.asarray(row_ids))
+        self.durations = durations
+        self.columns = columns
+
+    @classmethod
+    def from_dataframe(cls, local_df: pd.DataFrame) -> "CatalogStore":
+        duration_col = config.JSON_FIELD_TO_CSV_COL["duration"]
+        columns: Dict[str, Any] = {}
+        for field in RESPONSE_FIELDS:
+            csv_col = config.JSON_FIELD_TO_CSV_COL.get(field)
+            if field == "duration" or csv_col not in local_df.columns:
+                continue
+            if field in config.CATALOG_CATEGORICAL_FIELDS:
+                columns[field] = CategoricalColumn.from_series(local_df[csv_col])
+            else:
+                columns[field] = TextColumn(local_df[csv_col])
+        return cls(
+            row_ids=local_df.index.to_numpy(dtype=np.int64),
+            durations=pd.to_numeric(local_df[duration_col], errors="coerce").to_numpy(dtype=np.float32),
+            columns=columns
+        )
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        arrays = {"row_ids": self.row_ids, "durations": self.durations}
+        column_meta = {}
+        for field, column in self.columns.items():
+            column_arrays, column_meta[field] = column.to_arrays()
+            arrays.update({f"{field}.{name}": array for name, array in column_arrays.items()})
+        return arrays, {"columns": column_meta}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> "CatalogStore":
+        columns: Dict[str, Any] = {}
+        for field, column_meta in meta["columns"].items():
+            if column_meta["kind"] == "categorical":
+                columns[field] = CategoricalColumn(arrays[f"{field}.codes"], column_meta["labels"])
+            else:
+                columns[field] = MappedTextColumn(arrays[f"{field}.blob"], arrays[f"{field}.offsets"])
+        return cls(row_ids=arrays["row_ids"], durations=arrays["durations"], columns=columns)
+
+    def __len__(self) -> int:
+        return int(self.row_ids.shape[0])
+
+    def iter_recommendations(
+        self,
+        row_ids: Sequence[int],
+        limit: Optional[int] = None,
+        scores: Optional[Sequence[float]] = None
+    ) -> Iterator[RecommendedAssessment]:
+        positions = self.row_lookup.get_indexer(np.asarray(row_ids, dtype=np.int64))
+        found = positions >= 0
+        positions = positions[found]
+        if limit is not None:
+            positions = positions[:limit]
+        gathered = {field: column.take(positions).tolist() for field, column in self.columns.items()}
+        durations = self.durations[positions]
+        gathered["duration"] = [None if np.isnan(value) else int(value) for value in durations]
+        if scores is not None:
+            kept_scores = np.asarray(scores, dtype=np.float64)[found][:positions.shape[0]]
+            gathered["score"] = [round(float(value), 6) for value in kept_scores]
+
+        for offset in range(positions.shape[0]):
+            try:
+                yield RecommendedAssessment(**{field: values[offset] for field, values in gathered.items()})
+            except Exception:
+                continue
+
+    def recommendations(
+        self,
+        row_ids: Sequence[int],
+        limit: Optional[int] = None,
+        scores: Optional[Sequence[float]] = None
+    ) -> List[RecommendedAssessment]:
+        return list(self.iter_recommendations(row_ids, limit, scores))
@@ -0,0 +1,55 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+import config
+
+blocking_executor = ThreadPoolExecutor(
+    max_workers=config.BLOCKING_POOL_SIZE,
+    thread_name_prefix="recommender-blocking"
+)
+
+class StageTimeoutError(TimeoutError):
+    def __init__(self, stage: str, timeout: Optional[float]):
+        super().__init__(f"Stage '{stage}' did not finish within {timeout}s.")
+        self.stage = stage
+        self.timeout = timeout
+
+class StageError(RuntimeError):
+    def __init__(self, stage: str, cause: BaseException):
+        super().__init__(f"Stage '{stage}' failed: {cause}")
+        self.stage = stage
+        self.cause = cause
+
+class ServerBusyError(Exception):
+    pass
+
+async def with_timeout(awaitable: Awaitable[Any], timeout: Optional[float], stage: str) -> Any:
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise StageTimeoutError(stage, timeout)
+
+async def run_blocking(func: Callable[..., Any], *args: Any, timeout: Optional[float] = None, stage: str = "blocking") -> Any:
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(blocking_executor, functools.partial(func, *args))
+    return await with_timeout(future, timeout, stage)
+
+def create_request_limiter() -> asyncio.Semaphore:
+    return asyncio.Semaphore(config.MAX_CONCURRENT_RECOMMENDATIONS)
+
+@asynccontextmanager
+async def request_slot(limiter: Optional[asyncio.Semaphore], timeout: Optional[float] = config.REQUEST_QUEUE_TIMEOUT_SECONDS):
+    if limiter is None:
+        yield
+        return
+    try:
+        await asyncio.wait_for(limiter.acquire(), timeout)
+    except asyncio.TimeoutError:
+        raise ServerBusyError("Too many concurrent recommendation requests, please retry shortly.")
+    try:
+        yield
+    finally:
+        limiter.release()
@@ -1,12 +1,111 @@
 from pathlib import Path
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 BASE_DIR = Path(__file__).resolve().parent
 CSV_FILE_PATH = BASE_DIR / "shlproducts.csv"
 
 LLM_MODEL_NAME = "llama3-8b-8192"
 COHERE_EMBEDDING_MODEL_NAME = "embed-english-v3.0"
 
+EMBEDDING_PROVIDERS = ["cohere", "sentence-transformers", "hashing"]
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "cohere")
+LOCAL_EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+HASHING_EMBEDDING_DIM = 1024
+
+CATALOG_PARQUET_SUFFIXES = {".parquet", ".pq"}
+CATALOG_ARROW_SUFFIXES = {".arrow", ".feather"}
+CATALOG_DOCUMENT_CHUNK_SIZE = 5000
+CATALOG_CATEGORICAL_FIELDS = ["adaptive_support", "remote_support", "test_type"]
+CATALOG_WATCH_ENABLED = os.getenv("CATALOG_WATCH_ENABLED", "false").lower() == "true"
+CATALOG_WATCH_INTERVAL_SECONDS = 5.0
+CATALOG_VERSION_HEADER = "X-Catalog-Version"
+BACKGROUND_STARTUP_ENABLED = os.getenv("BACKGROUND_STARTUP_ENABLED", "false").lower() == "true"
+
+INDEX_DIR = BASE_DIR / "index_artifact"
+INDEX_USE_MMAP = True
+SHARED_INDEX_ENABLED = os.getenv("SHARED_INDEX_ENABLED", "false").lower() == "true"
+EMBEDDING_BATCH_SIZE = 96
+
+FAISS_INDEX_TYPES = ["flat", "ivf_flat", "ivf_pq", "hnsw"]
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")
+FAISS_SCALAR_QUANTIZATION = os.getenv("FAISS_SCALAR_QUANTIZATION", "false").lower() == "true"
+FAISS_ANN_MIN_VECTORS = 10_000
+FAISS_IVF_NLIST = int(os.getenv("FAISS_IVF_NLIST", "0"))
+FAISS_IVF_MIN_POINTS_PER_LIST = 39
+FAISS_IVF_NPROBE = int(os.getenv("FAISS_IVF_NPROBE", "16"))
+FAISS_PQ_M = 32
+FAISS_PQ_NBITS = 8
+FAISS_HNSW_M = 32
+FAISS_HNSW_EF_CONSTRUCTION = 200
+FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+
+ANALYSIS_CACHE_ENABLED = True
+ANALYSIS_CACHE_MAX_ENTRIES = 2048
+ANALYSIS_CACHE_TTL_SECONDS = 24 * 60 * 60
+ANALYSIS_CACHE_DB_PATH = BASE_DIR / "cache" / "query_analysis.sqlite3"
+
+SEMANTIC_CACHE_ENABLED = True
+SEMANTIC_CACHE_MAX_ENTRIES = 1024
+SEMANTIC_CACHE_SIMILARITY_THRESHOLD = 0.95
+SEMANTIC_CACHE_TTL_SECONDS = 6 * 60 * 60
+SEMANTIC_CACHE_SIMILARITY_BUCKETS = [0.95, 0.96, 0.97, 0.98, 0.99, 1.0]
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+UPSTREAM_STAGES = {"llm", "embedding"}
+STREAMING_MEDIA_TYPES = {"application/x-ndjson", "text/event-stream"}
+
+BLOCKING_POOL_SIZE = 16
+MAX_CONCURRENT_RECOMMENDATIONS = 64
+REQUEST_QUEUE_TIMEOUT_SECONDS = 10.0
+LLM_TIMEOUT_SECONDS = 30.0
+EMBEDDING_TIMEOUT_SECONDS = 10.0
+RETRIEVAL_TIMEOUT_SECONDS = 15.0
+
+PARALLEL_RETRIEVAL_ENABLED = False
+LLM_LATENCY_BUDGET_SECONDS = 2.0
+MERGE_RAW_QUERY_RESULTS = True
+RAW_QUERY_RESULTS_WEIGHT = 0.5
+RRF_K = 60
+
+HYBRID_RETRIEVAL_ENABLED = True
+LEXICAL_TOP_K = 20
+DENSE_RETRIEVAL_WEIGHT = 1.0
+LEXICAL_RETRIEVAL_WEIGHT = 1.0
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+FACET_FILTERING_ENABLED = True
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_CANDIDATE_POOL = 100
+RERANK_LATENCY_BUDGET_SECONDS = float(os.getenv("RERANK_LATENCY_BUDGET_SECONDS", "0.1"))
+RERANK_FEATURE_WEIGHTS = {
+    "similarity": 1.0,
+    "bm25": 0.5,
+    "duration_fit": 0.5,
+    "job_level_match": 0.25,
+    "retrieval_rank": 1.0,
+    "cross_encoder": 1.0,
+}
+RERANK_WEIGHTS_PATH = Path(os.getenv("RERANK_WEIGHTS_PATH", str(BASE_DIR / "rerank_weights.json")))
+RERANK_CROSS_ENCODER_ENABLED = os.getenv("RERANK_CROSS_ENCODER_ENABLED", "false").lower() == "true"
+RERANK_CROSS_ENCODER_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_CROSS_ENCODER_BACKEND = os.getenv("RERANK_CROSS_ENCODER_BACKEND", "onnx")
+RERANK_CROSS_ENCODER_BATCH_SIZE = 32
+
+MICRO_BATCH_ENABLED = True
+MICRO_BATCH_WINDOW_MS = 5.0
+MICRO_BATCH_MAX_SIZE = 32
+MICRO_BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64]
+
+BATCH_MAX_QUERIES = 5000
+BATCH_CHUNK_SIZE = 96
+BATCH_LLM_CONCURRENCY = 8
+
 NUM_DOCS_TO_RETRIEVE = 20
 NUM_DOCS_TO_RETURN = 10
 JOB_ROLE_REPETITION = 9
@@ -21,8 +120,23 @@ CSV_TO_JSON_MAP = {
     "Assessment Name": "assessment_name",
 }
 
+JSON_FIELD_TO_CSV_COL = {json_field: csv_col for csv_col, json_field in CSV_TO_JSON_MAP.items()}
 EXPECTED_CSV_COLS = list(CSV_TO_JSON_MAP.keys())
 CONTENT_CSV_COLS = ["Assessment Name", "description", "Test Type"]
+JOB_LEVELS_CSV_COL = "job levels"
+LANGUAGES_CSV_COL = "languages"
+FACET_CSV_COLS = [JOB_LEVELS_CSV_COL, LANGUAGES_CSV_COL]
+FACET_MISSING_VALUES = {"not found", "n/a", "none"}
+TEST_TYPE_CODES = {
+    "A": "Ability & Aptitude",
+    "B": "Biodata & Situational Judgement",
+    "C": "Competencies",
+    "D": "Development & 360",
+    "E": "Assessment Exercises",
+    "K": "Knowledge & Skills",
+    "P": "Personality & Behavior",
+    "S": "Simulations",
+}
 METADATA_CSV_COLS = EXPECTED_CSV_COLS
 
 TARGET_JSON_FIELDS = [
@@ -42,25 +156,14 @@ TARGET_FIELD_TO_METADATA_KEY = {
 }
 TARGET_FIELD_TO_METADATA_KEY["row_index"] = "row_index"
 
-for field in TARGET_JSON_FIELDS:
-    if field not in TARGET_FIELD_TO_METADATA_KEY and field != 'assessment_name':
-        original_csv_col = [csv_col for csv_col, json_val in CSV_TO_JSON_MAP.items() if json_val == field]
-        if not original_csv_col:
-            raise ValueError(f"Configuration Error: Target JSON field '{field}' listed in "
-                             f"TARGET_JSON_FIELDS but was not found as a value in CSV_TO_JSON_MAP.")
-        else:
+def validate_mappings() -> None:
+    for field in TARGET_JSON_FIELDS:
+        if field not in TARGET_FIELD_TO_METADATA_KEY:
+            original_csv_col = [csv_col for csv_col, json_val in CSV_TO_JSON_MAP.items() if json_val == field]
+            if not original_csv_col:
+                raise ValueError(f"Configuration Error: Target JSON field '{field}' listed in "
+                                 f"TARGET_JSON_FIELDS but was not found as a value in CSV_TO_JSON_MAP.")
             raise ValueError(f"Configuration Error: Target JSON field '{field}' (from CSV column '{original_csv_col[0]}') "
                              f"listed in TARGET_JSON_FIELDS but failed to generate a key in TARGET_FIELD_TO_METADATA_KEY.")
-
-if 'assessment_name' in TARGET_JSON_FIELDS and 'assessment_name' not in TARGET_FIELD_TO_METADATA_KEY:
-    assessment_name_csv_col = [csv_col for csv_col, json_val in CSV_TO_JSON_MAP.items() if json_val == 'assessment_name']
-    if assessment_name_csv_col:
-        TARGET_FIELD_TO_METADATA_KEY['assessment_name'] = assessment_name_csv_col[0].lower().replace(' ', '_').replace('/', '_')
-    else:
-        raise ValueError("Configuration Error: 'assessment_name' is in TARGET_JSON_FIELDS, "
-                         "but 'Assessment Name' (or equivalent) is missing as a key in CSV_TO_JSON_MAP.")
-
-print("--- Configured Mappings ---")
-print("CSV_TO_JSON_MAP:", CSV_TO_JSON_MAP)
-print("TARGET_FIELD_TO_METADATA_KEY:", TARGET_FIELD_TO_METADATA_KEY)
-print("--------------------------")
\ No newline at end of file
+    logger.debug("CSV_TO_JSON_MAP: %s", CSV_TO_JSON_MAP)
+    logger.debug("TARGET_FIELD_TO_METADATA_KEY: %s", TARGET_FIELD_TO_METADATA_KEY)
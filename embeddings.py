@@ -0,0 +1,79 @@
+import hashlib
+import math
+import os
+import re
+from typing import List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+import config
+
+load_dotenv()
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9#+.]+")
+
+class HashingEmbeddings(Embeddings):
+    def __init__(self, dimension: int = config.HASHING_EMBEDDING_DIM):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> List[float]:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        features = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        counts = {}
+        for feature in features:
+            counts[feature] = counts.get(feature, 0) + 1
+        for feature, count in counts.items():
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimension
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign * (1.0 + math.log(count))
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+def embedding_model_id(provider: Optional[str] = None) -> str:
+    provider = provider or config.EMBEDDING_PROVIDER
+    if provider == "cohere":
+        return config.COHERE_EMBEDDING_MODEL_NAME
+    if provider == "sentence-transformers":
+        return config.LOCAL_EMBEDDING_MODEL_NAME
+    if provider == "hashing":
+        return f"hashing-{config.HASHING_EMBEDDING_DIM}"
+    raise ValueError(f"Unknown embedding provider '{provider}'. Expected one of: {', '.join(config.EMBEDDING_PROVIDERS)}.")
+
+def create_embedding_model(provider: Optional[str] = None) -> Embeddings:
+    provider = provider or config.EMBEDDING_PROVIDER
+    if provider == "cohere":
+        from langchain_community.embeddings import CohereEmbeddings
+
+        cohere_api_key = os.getenv("COHERE_API_KEY")
+        if not cohere_api_key:
+            raise ValueError("COHERE_API_KEY not found.")
+        return CohereEmbeddings(
+            cohere_api_key=cohere_api_key,
+            model=config.COHERE_EMBEDDING_MODEL_NAME,
+            user_agent="langchain"
+        )
+    if provider == "sentence-transformers":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        try:
+            return HuggingFaceEmbeddings(
+                model_name=config.LOCAL_EMBEDDING_MODEL_NAME,
+                encode_kwargs={"normalize_embeddings": True}
+            )
+        except ImportError as e:
+            raise ValueError("The sentence-transformers embedding provider requires the 'sentence-transformers' package.") from e
+    if provider == "hashing":
+        return HashingEmbeddings()
+    raise ValueError(f"Unknown embedding provider '{provider}'. Expected one of: {', '.join(config.EMBEDDING_PROVIDERS)}.")
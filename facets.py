@@ -0,0 +1,157 @@
+import logging
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+from models import AssessmentSearchCriteria, parse_test_type
+
+logger = logging.getLogger(__name__)
+
+VALUE_FACETS = ("test_types", "job_levels", "languages")
+
+class FacetSelection(NamedTuple):
+    positions: np.ndarray
+    row_ids: np.ndarray
+
+def split_facet_values(value) -> List[str]:
+    if not isinstance(value, str):
+        return []
+    return [
+        part.strip() for part in value.split(",")
+        if part.strip() and part.strip().casefold() not in config.FACET_MISSING_VALUES
+    ]
+
+def build_value_masks(values_per_row: Iterable[List[str]], num_rows: int) -> Dict[str, np.ndarray]:
+    masks: Dict[str, np.ndarray] = {}
+    labels: Dict[str, str] = {}
+    for position, values in enumerate(values_per_row):
+        for value in values:
+            key = value.casefold()
+            if key not in masks:
+                masks[key] = np.zeros(num_rows, dtype=bool)
+                labels[key] = value
+            masks[key][position] = True
+    return {labels[key]: mask for key, mask in masks.items()}
+
+def match_value_masks(
+    value_masks: Dict[str, np.ndarray],
+    requested: List[str],
+    num_rows: int,
+    aliases: Optional[Dict[str, str]] = None
+) -> Optional[np.ndarray]:
+    masks_by_key = {label.casefold(): mask for label, mask in value_masks.items()}
+    alias_keys = {alias.casefold(): label.casefold() for alias, label in (aliases or {}).items()}
+    combined = np.zeros(num_rows, dtype=bool)
+    matched_any = False
+    for requested_value in requested:
+        needle = requested_value.strip().casefold()
+        mask = masks_by_key.get(alias_keys.get(needle, needle))
+        if mask is not None:
+            combined |= mask
+            matched_any = True
+    # A value the catalog has never heard of is not a usable constraint.
+    return combined if matched_any else None
+
+class FacetIndex:
+    def __init__(self, local_df: pd.DataFrame):
+        self.num_rows = len(local_df)
+        self.row_ids = local_df.index.to_numpy(dtype=np.int64)
+
+        duration_col = config.JSON_FIELD_TO_CSV_COL["duration"]
+        self.duration = pd.to_numeric(local_df[duration_col], errors="coerce").to_numpy(dtype=np.float32)
+
+        remote_col = config.JSON_FIELD_TO_CSV_COL["remote_support"]
+        adaptive_col = config.JSON_FIELD_TO_CSV_COL["adaptive_support"]
+        self.remote_supported = local_df[remote_col].astype(str).str.strip().str.casefold().eq("available").to_numpy()
+        self.adaptive_supported = local_df[adaptive_col].astype(str).str.strip().str.casefold().eq("available").to_numpy()
+
+        test_type_col = config.JSON_FIELD_TO_CSV_COL["test_type"]
+        self.test_types = build_value_masks((parse_test_type(value) for value in local_df[test_type_col]), self.num_rows)
+        self.job_levels = build_value_masks(
+            (split_facet_values(value) for value in local_df.get(config.JOB_LEVELS_CSV_COL, pd.Series(dtype=object))),
+            self.num_rows
+        )
+        self.languages = build_value_masks(
+            (split_facet_values(value) for value in local_df.get(config.LANGUAGES_CSV_COL, pd.Series(dtype=object))),
+            self.num_rows
+        )
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        arrays = {
+            "row_ids": self.row_ids,
+            "duration": self.duration,
+            "remote_supported": self.remote_supported,
+            "adaptive_supported": self.adaptive_supported,
+        }
+        meta: Dict[str, Any] = {}
+        for facet in VALUE_FACETS:
+            value_masks = getattr(self, facet)
+            meta[facet] = list(value_masks)
+            arrays[f"{facet}.masks"] = (
+                np.stack(list(value_masks.values())) if value_masks else np.zeros((0, self.num_rows), dtype=bool)
+            )
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> "FacetIndex":
+        facet_index = cls.__new__(cls)
+        facet_index.row_ids = arrays["row_ids"]
+        facet_index.num_rows = int(facet_index.row_ids.shape[0])
+        facet_index.duration = arrays["duration"]
+        facet_index.remote_supported = arrays["remote_supported"]
+        facet_index.adaptive_supported = arrays["adaptive_supported"]
+        for facet in VALUE_FACETS:
+            masks = arrays[f"{facet}.masks"]
+            setattr(facet_index, facet, {label: masks[position] for position, label in enumerate(meta[facet])})
+        return facet_index
+
+    def mask(self, criteria: Optional[AssessmentSearchCriteria]) -> Optional[np.ndarray]:
+        if criteria is None:
+            return None
+        constraints = []
+        if criteria.max_duration_minutes is not None:
+            constraints.append(self.duration <= criteria.max_duration_minutes)
+        if criteria.remote_testing_required:
+            constraints.append(self.remote_supported)
+        if criteria.adaptive_required:
+            constraints.append(self.adaptive_supported)
+        for requested, value_masks, aliases in (
+            (criteria.test_types, self.test_types, config.TEST_TYPE_CODES),
+            (criteria.job_levels, self.job_levels, None),
+            (criteria.languages, self.languages, None),
+        ):
+            if requested:
+                facet_mask = match_value_masks(value_masks, requested, self.num_rows, aliases)
+                if facet_mask is not None:
+                    constraints.append(facet_mask)
+        if not constraints:
+            return None
+        return np.logical_and.reduce(constraints)
+
+    def select(self, criteria: Optional[AssessmentSearchCriteria]) -> Optional[FacetSelection]:
+        mask = self.mask(criteria)
+        if mask is None:
+            return None
+        positions = np.flatnonzero(mask)
+        if positions.size == 0:
+            logger.info("No catalog rows satisfy the requested constraints; searching without filters.")
+            return None
+        return FacetSelection(positions=positions, row_ids=self.row_ids[positions])
+
+def catalog_facet_vocabulary(local_df: pd.DataFrame) -> Dict[str, List[str]]:
+    test_type_col = config.JSON_FIELD_TO_CSV_COL["test_type"]
+    vocabulary = {"test_types": set(), "job_levels": set(), "languages": set()}
+    for value in local_df[test_type_col]:
+        vocabulary["test_types"].update(parse_test_type(value))
+    for facet, csv_col in (("job_levels", config.JOB_LEVELS_CSV_COL), ("languages", config.LANGUAGES_CSV_COL)):
+        if csv_col in local_df.columns:
+            for value in local_df[csv_col]:
+                vocabulary[facet].update(split_facet_values(value))
+    return {facet: sorted(values) for facet, values in vocabulary.items()}
+
+def create_facet_index(local_df: pd.DataFrame) -> Optional[FacetIndex]:
+    if not config.FACET_FILTERING_ENABLED:
+        return None
+    return FacetIndex(local_df)
@@ -1,7 +1,15 @@
 from models import AssessmentSearchCriteria
+from typing import Dict, Hashable, List, Optional, Sequence
 import config
 
-def construct_search_query_from_structured(criteria: AssessmentSearchCriteria) -> str:
+def construct_search_query_from_structured(criteria: AssessmentSearchCriteria, compact: bool = False) -> str:
+    if compact:
+        compact_parts = [criteria.job_role, criteria.candidate_level] + list(criteria.key_skills_or_concepts or [])
+        compact_parts = [part for part in compact_parts if part]
+        if not compact_parts:
+            return "job assessment"
+        return "assessment for " + " ".join(dict.fromkeys(compact_parts))
+
     query_parts = []
 
     if criteria.job_role:
@@ -25,4 +33,19 @@ def construct_search_query_from_structured(criteria: AssessmentSearchCriteria) -
             seen.add(part_lower)
 
     search_query = " ".join(final_query_parts)
-    return f"assessment for {search_query}"
\ No newline at end of file
+    return f"assessment for {search_query}"
+
+def reciprocal_rank_fusion(
+    ranked_lists: Sequence[Sequence[Hashable]],
+    weights: Optional[Sequence[float]] = None,
+    k: int = config.RRF_K
+) -> List[Hashable]:
+    if weights is None:
+        weights = [1.0] * len(ranked_lists)
+    scores: Dict[Hashable, float] = {}
+    for ranked, weight in zip(ranked_lists, weights):
+        for rank, key in enumerate(ranked):
+            if key is None:
+                continue
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,321 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+import config
+from ann_index import configure_index_search, is_exact_index
+from embeddings import embedding_model_id
+
+MANIFEST_FILE_NAME = "manifest.json"
+INDEX_FILE_NAME = "index.faiss"
+EXACT_VECTORS_FILE_NAME = "vectors.faiss"
+DOCSTORE_FILE_NAME = "index.pkl"
+ROW_IDS_FILE_NAME = "row_ids.npy"
+ROW_HASHES_FILE_NAME = "row_hashes.json"
+BUILD_LOCK_FILE_NAME = ".build.lock"
+COMPONENTS_DIR_NAME = "components"
+COMPONENTS_MANIFEST_FILE_NAME = "components.json"
+MANIFEST_FORMAT_VERSION = 1
+
+MANIFEST_COMPATIBLE_KEYS = ("format_version", "embedding_provider", "embedding_model", "content_columns")
+MANIFEST_MATCH_KEYS = MANIFEST_COMPATIBLE_KEYS + ("csv_sha256", "index_type", "index_options")
+
+def compute_file_hash(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def compute_text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def build_manifest(csv_path: Path) -> Dict[str, Any]:
+    return {
+        "format_version": MANIFEST_FORMAT_VERSION,
+        "csv_sha256": compute_file_hash(csv_path),
+        "embedding_provider": config.EMBEDDING_PROVIDER,
+        "embedding_model": embedding_model_id(),
+        "content_columns": list(config.CONTENT_CSV_COLS),
+        "index_type": config.FAISS_INDEX_TYPE,
+        "index_options": {
+            "scalar_quantization": config.FAISS_SCALAR_QUANTIZATION,
+            "min_vectors": config.FAISS_ANN_MIN_VECTORS,
+            "ivf_nlist": config.FAISS_IVF_NLIST,
+            "pq_m": config.FAISS_PQ_M,
+            "pq_nbits": config.FAISS_PQ_NBITS,
+            "hnsw_m": config.FAISS_HNSW_M,
+        },
+    }
+
+def read_manifest(index_dir: Path, file_name: str = MANIFEST_FILE_NAME) -> Optional[Dict[str, Any]]:
+    manifest_path = Path(index_dir) / file_name
+    if not manifest_path.exists():
+        return None
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+def manifest_matches(stored: Optional[Dict[str, Any]], expected: Dict[str, Any], keys=MANIFEST_MATCH_KEYS) -> bool:
+    if not stored:
+        return False
+    return all(stored.get(key) == expected.get(key) for key in keys)
+
+def manifest_compatible(stored: Optional[Dict[str, Any]], expected: Dict[str, Any]) -> bool:
+    return manifest_matches(stored, expected, keys=MANIFEST_COMPATIBLE_KEYS)
+
+def read_row_hashes(index_dir: Path) -> Optional[Dict[str, str]]:
+    row_hashes_path = Path(index_dir) / ROW_HASHES_FILE_NAME
+    if not row_hashes_path.exists():
+        return None
+    try:
+        with open(row_hashes_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+def position_row_ids(vectorstore: FAISS) -> np.ndarray:
+    row_ids = getattr(vectorstore, "row_ids", None)
+    if row_ids is not None:
+        return row_ids
+    row_ids = np.full(vectorstore.index.ntotal, -1, dtype=np.int64)
+    for position, doc_id in vectorstore.index_to_docstore_id.items():
+        doc = vectorstore.docstore.search(doc_id)
+        if isinstance(doc, Document) and doc.metadata.get("row_index") is not None:
+            row_ids[position] = int(doc.metadata["row_index"])
+    return row_ids
+
+def row_id_vectorstore(embedding_function: Any, index: Any, row_ids: np.ndarray, source: Optional[FAISS] = None) -> FAISS:
+    options = {}
+    if source is not None:
+        options = {
+            "relevance_score_fn": source.override_relevance_score_fn,
+            "normalize_L2": source._normalize_L2,
+            "distance_strategy": source.distance_strategy,
+        }
+    vectorstore = FAISS(
+        embedding_function=embedding_function,
+        index=index,
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+        **options
+    )
+    # Serving only resolves FAISS positions to row ids; the keyed docstore is loaded only to edit the index.
+    vectorstore.row_ids = row_ids
+    return vectorstore
+
+def serving_vectorstore(source: FAISS) -> FAISS:
+    return row_id_vectorstore(source.embedding_function, source.index, position_row_ids(source), source)
+
+def save_index(
+    vectorstore: FAISS,
+    index_dir: Path,
+    manifest: Dict[str, Any],
+    row_hashes: Optional[Dict[str, str]] = None,
+    exact_index: Optional[Any] = None
+) -> None:
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    suffix = f".tmp-{os.getpid()}"
+
+    index_tmp = index_dir / (INDEX_FILE_NAME + suffix)
+    docstore_tmp = index_dir / (DOCSTORE_FILE_NAME + suffix)
+    manifest_tmp = index_dir / (MANIFEST_FILE_NAME + suffix)
+    row_hashes_tmp = index_dir / (ROW_HASHES_FILE_NAME + suffix)
+    exact_vectors_tmp = index_dir / (EXACT_VECTORS_FILE_NAME + suffix)
+    row_ids_tmp = index_dir / (ROW_IDS_FILE_NAME + suffix)
+
+    faiss.write_index(vectorstore.index, str(index_tmp))
+    with open(row_ids_tmp, "wb") as handle:
+        np.save(handle, np.ascontiguousarray(position_row_ids(vectorstore), dtype=np.int64), allow_pickle=False)
+    if exact_index is not None:
+        faiss.write_index(exact_index, str(exact_vectors_tmp))
+    with open(docstore_tmp, "wb") as handle:
+        pickle.dump((vectorstore.docstore, vectorstore.index_to_docstore_id), handle)
+
+    if row_hashes is not None:
+        with open(row_hashes_tmp, "w", encoding="utf-8") as handle:
+            json.dump(row_hashes, handle)
+
+    full_manifest = dict(manifest)
+    full_manifest["num_vectors"] = int(vectorstore.index.ntotal)
+    full_manifest["created_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    with open(manifest_tmp, "w", encoding="utf-8") as handle:
+        json.dump(full_manifest, handle, indent=2)
+
+    # Drop the old manifest first and publish the new one last, so a half-written
+    # artifact never looks valid to a concurrent reader.
+    (index_dir / MANIFEST_FILE_NAME).unlink(missing_ok=True)
+    os.replace(index_tmp, index_dir / INDEX_FILE_NAME)
+    os.replace(row_ids_tmp, index_dir / ROW_IDS_FILE_NAME)
+    if exact_index is not None:
+        os.replace(exact_vectors_tmp, index_dir / EXACT_VECTORS_FILE_NAME)
+    else:
+        (index_dir / EXACT_VECTORS_FILE_NAME).unlink(missing_ok=True)
+    os.replace(docstore_tmp, index_dir / DOCSTORE_FILE_NAME)
+    if row_hashes is not None:
+        os.replace(row_hashes_tmp, index_dir / ROW_HASHES_FILE_NAME)
+    else:
+        (index_dir / ROW_HASHES_FILE_NAME).unlink(missing_ok=True)
+    os.replace(manifest_tmp, index_dir / MANIFEST_FILE_NAME)
+
+def index_entry(row_index: int) -> Document:
+    return Document(page_content="", metadata={"row_index": int(row_index)})
+
+def compact_docstore(docstore: InMemoryDocstore) -> None:
+    # Artifacts written before the catalog store kept page content and every catalog field per entry.
+    for doc_id, doc in docstore._dict.items():
+        if doc.page_content or set(doc.metadata) != {"row_index"}:
+            docstore._dict[doc_id] = index_entry(doc.metadata["row_index"])
+
+def read_faiss_index(index_path: Path, use_mmap: bool) -> Any:
+    if use_mmap:
+        mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        try:
+            return faiss.read_index(str(index_path), mmap_flag | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            pass
+    return faiss.read_index(str(index_path))
+
+def load_index(
+    index_dir: Path,
+    embedding_model: Any,
+    expected_manifest: Dict[str, Any],
+    use_mmap: bool = config.INDEX_USE_MMAP,
+    require_exact: bool = True,
+    exact_vectors: bool = False
+) -> Optional[FAISS]:
+    index_dir = Path(index_dir)
+    stored_manifest = read_manifest(index_dir)
+    if require_exact and not manifest_matches(stored_manifest, expected_manifest):
+        return None
+    if not require_exact and not manifest_compatible(stored_manifest, expected_manifest):
+        return None
+
+    index_path = index_dir / INDEX_FILE_NAME
+    if exact_vectors and (index_dir / EXACT_VECTORS_FILE_NAME).exists():
+        index_path = index_dir / EXACT_VECTORS_FILE_NAME
+    if not index_path.exists():
+        return None
+
+    if not exact_vectors:
+        row_ids_path = index_dir / ROW_IDS_FILE_NAME
+        if not row_ids_path.exists():
+            return None
+        index = configure_index_search(read_faiss_index(index_path, use_mmap))
+        try:
+            row_ids = np.load(row_ids_path, mmap_mode="r" if use_mmap else None, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        if row_ids.shape != (index.ntotal,):
+            return None
+        return row_id_vectorstore(embedding_model, index, row_ids)
+
+    # Exact vectors are loaded to be edited, which needs the keyed docstore as well.
+    docstore_path = index_dir / DOCSTORE_FILE_NAME
+    if not docstore_path.exists():
+        return None
+    index = read_faiss_index(index_path, use_mmap)
+    if not is_exact_index(index):
+        return None
+    with open(docstore_path, "rb") as handle:
+        docstore, index_to_docstore_id = pickle.load(handle)
+    compact_docstore(docstore)
+
+    return FAISS(
+        embedding_function=embedding_model,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+    )
+
+def with_index(source: FAISS, index: Any) -> FAISS:
+    return FAISS(
+        embedding_function=source.embedding_function,
+        index=index,
+        docstore=source.docstore,
+        index_to_docstore_id=source.index_to_docstore_id,
+        relevance_score_fn=source.override_relevance_score_fn,
+        normalize_L2=source._normalize_L2,
+        distance_strategy=source.distance_strategy,
+    )
+
+@contextmanager
+def index_build_lock(index_dir: Path, exclusive: bool = True) -> Iterator[None]:
+    try:
+        import fcntl
+    except ImportError:
+        # No advisory locks on this platform; concurrent builders fall back to last-writer-wins.
+        yield
+        return
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    with open(index_dir / BUILD_LOCK_FILE_NAME, "a+") as handle:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+def save_components(
+    index_dir: Path,
+    manifest: Dict[str, Any],
+    components: Dict[str, Tuple[Dict[str, np.ndarray], Dict[str, Any]]]
+) -> None:
+    components_dir = Path(index_dir) / COMPONENTS_DIR_NAME
+    components_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = components_dir / COMPONENTS_MANIFEST_FILE_NAME
+    suffix = f".tmp-{os.getpid()}"
+
+    manifest_path.unlink(missing_ok=True)
+    component_entries = {}
+    for component_name, (arrays, meta) in components.items():
+        for array_name, array in arrays.items():
+            file_name = f"{component_name}.{array_name}.npy"
+            tmp_path = components_dir / (file_name + suffix)
+            with open(tmp_path, "wb") as handle:
+                np.save(handle, np.ascontiguousarray(array), allow_pickle=False)
+            os.replace(tmp_path, components_dir / file_name)
+        component_entries[component_name] = {"arrays": sorted(arrays), "meta": meta}
+
+    full_manifest = dict(manifest)
+    full_manifest["components"] = component_entries
+    full_manifest["created_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    manifest_tmp = components_dir / (COMPONENTS_MANIFEST_FILE_NAME + suffix)
+    with open(manifest_tmp, "w", encoding="utf-8") as handle:
+        json.dump(full_manifest, handle)
+    os.replace(manifest_tmp, manifest_path)
+
+def load_components(
+    index_dir: Path,
+    expected_manifest: Dict[str, Any],
+    use_mmap: bool = True
+) -> Optional[Dict[str, Tuple[Dict[str, np.ndarray], Dict[str, Any]]]]:
+    components_dir = Path(index_dir) / COMPONENTS_DIR_NAME
+    stored_manifest = read_manifest(components_dir, COMPONENTS_MANIFEST_FILE_NAME)
+    if not manifest_matches(stored_manifest, expected_manifest):
+        return None
+    components = {}
+    try:
+        for component_name, entry in stored_manifest.get("components", {}).items():
+            arrays = {
+                array_name: np.load(components_dir / f"{component_name}.{array_name}.npy", mmap_mode="r" if use_mmap else None, allow_pickle=False)
+                for array_name in entry["arrays"]
+            }
+            components[component_name] = (arrays, entry["meta"])
+    except (OSError, ValueError, KeyError):
+        return None
+    return components
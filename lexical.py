@@ -0,0 +1,120 @@
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import config
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9#+.]+")
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        token = token.rstrip(".")
+        if token:
+            tokens.append(token)
+    return tokens
+
+class BM25Index:
+    def __init__(
+        self,
+        texts: Sequence[str],
+        row_ids: Sequence[int],
+        k1: float = config.BM25_K1,
+        b: float = config.BM25_B
+    ):
+        self.row_ids = np.asarray(row_ids, dtype=np.int64)
+        self.num_docs = len(texts)
+        self.vocabulary: Dict[str, int] = {}
+
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        term_freqs: List[int] = []
+        doc_lengths = np.zeros(self.num_docs, dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[doc_id] = len(tokens)
+            counts: Dict[int, int] = {}
+            for token in tokens:
+                term_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                counts[term_id] = counts.get(term_id, 0) + 1
+            term_ids.extend(counts.keys())
+            doc_ids.extend([doc_id] * len(counts))
+            term_freqs.extend(counts.values())
+
+        term_ids_array = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids_array, kind="stable")
+        self.posting_docs = np.asarray(doc_ids, dtype=np.int32)[order]
+        tf = np.asarray(term_freqs, dtype=np.float32)[order]
+        doc_freqs = np.bincount(term_ids_array, minlength=len(self.vocabulary))
+        self.posting_offsets = np.concatenate(([0], np.cumsum(doc_freqs))).astype(np.int64)
+
+        idf = np.log1p((self.num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        average_length = float(doc_lengths.mean()) if self.num_docs else 0.0
+        length_norm = 1.0 - b + b * (doc_lengths / average_length if average_length else 0.0)
+        posting_terms = term_ids_array[order]
+        # BM25 weights are precomputed per posting, so query scoring is a gather and a bincount.
+        self.posting_weights = (
+            idf[posting_terms] * tf * (k1 + 1.0) / (tf + k1 * length_norm[self.posting_docs])
+        ).astype(np.float32)
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        arrays = {
+            "row_ids": self.row_ids,
+            "posting_docs": self.posting_docs,
+            "posting_offsets": self.posting_offsets,
+            "posting_weights": self.posting_weights,
+        }
+        return arrays, {"vocabulary": list(self.vocabulary)}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> "BM25Index":
+        lexical_index = cls.__new__(cls)
+        lexical_index.row_ids = arrays["row_ids"]
+        lexical_index.num_docs = int(lexical_index.row_ids.shape[0])
+        lexical_index.vocabulary = {token: term_id for term_id, token in enumerate(meta["vocabulary"])}
+        lexical_index.posting_docs = arrays["posting_docs"]
+        lexical_index.posting_offsets = arrays["posting_offsets"]
+        lexical_index.posting_weights = arrays["posting_weights"]
+        return lexical_index
+
+    def score(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        term_ids = {self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary}
+        if not term_ids:
+            return scores
+        slices = [
+            np.arange(self.posting_offsets[term_id], self.posting_offsets[term_id + 1])
+            for term_id in term_ids
+        ]
+        positions = np.concatenate(slices)
+        return np.bincount(
+            self.posting_docs[positions],
+            weights=self.posting_weights[positions],
+            minlength=self.num_docs
+        ).astype(np.float32)
+
+    def search(self, query: str, k: int, allowed_docs: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        scores = self.score(query)
+        if allowed_docs is not None:
+            mask = np.zeros(self.num_docs, dtype=bool)
+            mask[allowed_docs] = True
+            scores[~mask] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size == 0:
+            return []
+        if candidates.size > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(self.row_ids[doc_id]), float(scores[doc_id])) for doc_id in candidates]
+
+def build_lexical_index(local_df: pd.DataFrame) -> BM25Index:
+    content_columns = [col for col in config.CONTENT_CSV_COLS if col in local_df.columns]
+    texts = local_df[content_columns].fillna("").astype(str).agg(" ".join, axis=1).tolist()
+    return BM25Index(texts, local_df.index.to_numpy())
+
+def create_lexical_index(local_df: pd.DataFrame) -> Optional[BM25Index]:
+    if not config.HYBRID_RETRIEVAL_ENABLED:
+        return None
+    return build_lexical_index(local_df)
@@ -1,11 +1,17 @@
 import sys
 import os
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 try:
-    from services import initialize_components
+    import config
+    from caches import create_analysis_cache, create_semantic_cache
+    from concurrency import create_request_limiter
+    from batching import create_retrieval_batcher
+    from reloader import create_catalog_reloader
     from api import router
+    from metrics import REQUEST_SECONDS, format_server_timing, start_request_timing
 except ImportError as e:
     sys.exit("Critical import error during startup.")
 except Exception as e:
@@ -27,33 +33,73 @@ app.add_middleware(
 
 app.include_router(router)
 
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    started = time.perf_counter()
+    timings = start_request_timing()
+    response = await call_next(request)
+    route_path = getattr(request.scope.get("route"), "path", "unmatched")
+    status = str(response.status_code)
+    media_type = response.headers.get("content-type", "").split(";")[0].strip()
+    if media_type not in config.STREAMING_MEDIA_TYPES:
+        elapsed = time.perf_counter() - started
+        REQUEST_SECONDS.observe(elapsed, route_path, status)
+        response.headers["Server-Timing"] = format_server_timing(timings, elapsed)
+        return response
+
+    # Streamed bodies are produced after the headers are sent, so their latency is taken when the body ends.
+    body_iterator = response.body_iterator
+
+    async def timed_body_iterator():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, route_path, status)
+
+    response.body_iterator = timed_body_iterator()
+    return response
+
 @app.on_event("startup")
 def startup_event():
+    app.state.analysis_cache = create_analysis_cache()
+    app.state.semantic_cache = create_semantic_cache()
+    app.state.request_limiter = create_request_limiter()
+    app.state.retrieval_batcher = create_retrieval_batcher()
+    app.state.snapshot = None
+    app.state.llm = None
+    app.state.embedding_model = None
+    config.validate_mappings()
+
+    if config.BACKGROUND_STARTUP_ENABLED:
+        # Bind the port right away; the catalog loads through the reloader and /health/ready reports when it is done.
+        app.state.catalog_reloader = create_catalog_reloader(app.state)
+        app.state.catalog_reloader.start_background_reload()
+        return
+
+    from services import initialize_components
+
     try:
-        (
-            initialized_df,
-            initialized_retriever,
-            initialized_chain,
-            initialized_llm,
-            initialized_embedding_model
-        ) = initialize_components()
-
-        app.state.dataframe = initialized_df
-        app.state.retriever = initialized_retriever
-        app.state.structured_chain = initialized_chain
+        initialized_snapshot, initialized_llm, initialized_embedding_model = initialize_components()
+
+        app.state.snapshot = initialized_snapshot
         app.state.llm = initialized_llm
         app.state.embedding_model = initialized_embedding_model
 
     except Exception as e:
-        app.state.dataframe = None
-        app.state.retriever = None
-        app.state.structured_chain = None
+        app.state.snapshot = None
         app.state.llm = None
         app.state.embedding_model = None
+    app.state.catalog_reloader = create_catalog_reloader(app.state)
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    pass
+    catalog_reloader = getattr(app.state, 'catalog_reloader', None)
+    if catalog_reloader is not None:
+        catalog_reloader.stop()
+    retrieval_batcher = getattr(app.state, 'retrieval_batcher', None)
+    if retrieval_batcher is not None:
+        await retrieval_batcher.stop()
 
 @app.get("/")
 async def read_root():
@@ -0,0 +1,152 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import config
+from concurrency import StageError, StageTimeoutError
+
+def escape_label_value(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], bucket: Optional[str] = None) -> str:
+    pairs = [f'{name}="{escape_label_value(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if bucket is not None:
+        pairs.append(f'le="{bucket}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        if not config.METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{format_labels(self.labelnames, labelvalues)} {value:g}")
+        return lines
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = config.METRICS_LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = sorted(buckets)
+        self._lock = threading.Lock()
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        if not config.METRICS_ENABLED:
+            return
+        with self._lock:
+            counts = self._counts.setdefault(labelvalues, [0] * (len(self.buckets) + 1))
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[position] += 1
+            counts[-1] += 1
+            self._sums[labelvalues] = self._sums.get(labelvalues, 0.0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labelvalues, counts in sorted(self._counts.items()):
+                labels = format_labels(self.labelnames, labelvalues)
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{format_labels(self.labelnames, labelvalues, f'{bound:g}')} {count}")
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, labelvalues, '+Inf')} {counts[-1]}")
+                lines.append(f"{self.name}_sum{labels} {self._sums[labelvalues]:g}")
+                lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[object] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Histogram:
+        metric = Histogram(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+STAGE_SECONDS = registry.histogram(
+    "recommender_stage_duration_seconds", "Time spent in each recommendation pipeline stage.", ("stage",)
+)
+REQUEST_SECONDS = registry.histogram(
+    "recommender_request_duration_seconds", "End-to-end HTTP request latency.", ("route", "status")
+)
+CACHE_EVENTS = registry.counter(
+    "recommender_cache_events_total", "Cache lookups by cache and result.", ("cache", "result")
+)
+LLM_FALLBACKS = registry.counter(
+    "recommender_llm_fallbacks_total", "Queries served without LLM query analysis, by reason.", ("reason",)
+)
+RERANK_FALLBACKS = registry.counter(
+    "recommender_rerank_fallbacks_total", "Results served in retrieval order because reranking failed or ran over budget.", ("reason",)
+)
+STAGE_ERRORS = registry.counter(
+    "recommender_errors_total", "Failed requests by the stage that failed.", ("stage",)
+)
+
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+def start_request_timing() -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+def record_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+@contextmanager
+def stage_span(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    except (StageError, StageTimeoutError):
+        raise
+    except Exception as e:
+        raise StageError(stage, e) from e
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+def format_server_timing(timings: Dict[str, float], total_seconds: Optional[float] = None) -> str:
+    entries = [f"{stage};dur={seconds * 1000.0:.1f}" for stage, seconds in timings.items()]
+    if total_seconds is not None:
+        entries.append(f"total;dur={total_seconds * 1000.0:.1f}")
+    return ", ".join(entries)
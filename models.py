@@ -1,10 +1,11 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Any, Union
+from typing import Annotated, List, Optional, Any, Union
 import ast
 import re
 
 class QueryRequest(BaseModel):
     query: str = Field(..., description="The user's natural language query for assessments.", min_length=1)
+    bypass_cache: bool = Field(False, description="Skip the semantic result cache and recompute recommendations for this query.")
 
 class RecommendedAssessment(BaseModel):
     url: Optional[str] = None
@@ -13,15 +14,29 @@ class RecommendedAssessment(BaseModel):
     duration: Optional[int] = None
     remote_support: Optional[str] = None
     test_type: Optional[Union[List[str], str]] = Field(default_factory=list)
+    score: Optional[float] = Field(None, description="Reranker relevance score; absent when results are in retrieval order.")
 
 class RecommendResponse(BaseModel):
     recommended_assessments: List[RecommendedAssessment]
 
+class BatchQueryRequest(BaseModel):
+    queries: List[Annotated[str, Field(min_length=1)]] = Field(..., description="Natural language queries, answered in order.", min_length=1)
+    stream: bool = Field(False, description="Stream one NDJSON line per query instead of a single JSON body.")
+
+class BatchRecommendResponse(BaseModel):
+    results: List[RecommendResponse]
+
 class AssessmentSearchCriteria(BaseModel):
     job_role: Optional[str] = Field(None, description="The primary job role or title mentioned (e.g., 'Software Engineer', 'Sales Manager').")
     candidate_level: Optional[str] = Field(None, description="The seniority or experience level (e.g., 'entry-level', 'senior', 'manager').")
     key_skills_or_concepts: Optional[List[str]] = Field(None, description="List of essential skills, knowledge areas, or job responsibilities (e.g., ['Python', 'data analysis', 'customer interaction']).")
-   
+    max_duration_minutes: Optional[int] = Field(None, description="Maximum assessment duration in minutes, only if the user explicitly limits it (e.g., 'under 30 minutes' -> 30).")
+    test_types: Optional[List[str]] = Field(None, description="Required assessment test types from the catalog vocabulary (e.g., ['Knowledge & Skills', 'Personality & Behavior']).")
+    remote_testing_required: Optional[bool] = Field(None, description="True only if the user explicitly requires remote testing support.")
+    adaptive_required: Optional[bool] = Field(None, description="True only if the user explicitly requires adaptive/IRT testing.")
+    job_levels: Optional[List[str]] = Field(None, description="Target job levels from the catalog vocabulary (e.g., ['Graduate', 'Entry-Level']).")
+    languages: Optional[List[str]] = Field(None, description="Languages the assessment must be available in (e.g., ['English (USA)']).")
+
 
 def parse_test_type(value: Any) -> List[str]:
     if isinstance(value, list):
@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+import config
+
+if TYPE_CHECKING:
+    from services import CatalogSnapshot
+
+logger = logging.getLogger(__name__)
+
+class ReloadInProgressError(RuntimeError):
+    pass
+
+class CatalogReloader:
+    def __init__(
+        self,
+        app_state: Any,
+        csv_path: Path = config.CSV_FILE_PATH,
+        poll_interval: float = config.CATALOG_WATCH_INTERVAL_SECONDS
+    ):
+        self.app_state = app_state
+        self.csv_path = Path(csv_path)
+        self.poll_interval = poll_interval
+        self._reload_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._loaded_signature = self._file_signature()
+
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_summary: Optional[Dict[str, Any]] = None
+        self.last_reload_at: Optional[float] = None
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.csv_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def in_progress(self) -> bool:
+        return self._reload_lock.locked()
+
+    def swap(self, new_snapshot: "CatalogSnapshot") -> None:
+        # One attribute assignment: requests that already read the previous snapshot finish on it.
+        self.app_state.snapshot = new_snapshot
+        semantic_cache = getattr(self.app_state, "semantic_cache", None)
+        if semantic_cache is not None:
+            semantic_cache.clear()
+
+    def _build(self) -> Tuple["CatalogSnapshot", Dict[str, Any]]:
+        from services import initialize_components, refresh_components
+
+        embedding_model_ref = getattr(self.app_state, "embedding_model", None)
+        llm_ref = getattr(self.app_state, "llm", None)
+        if embedding_model_ref is None or llm_ref is None:
+            new_snapshot, new_llm, new_embedding_model = initialize_components(self.csv_path)
+            self.app_state.llm = new_llm
+            self.app_state.embedding_model = new_embedding_model
+            return new_snapshot, {"mode": "initial"}
+        return refresh_components(getattr(self.app_state, "snapshot", None), embedding_model_ref, llm_ref, self.csv_path)
+
+    def reload(self) -> Dict[str, Any]:
+        if not self._reload_lock.acquire(blocking=False):
+            raise ReloadInProgressError("A catalog reload is already in progress.")
+        try:
+            signature = self._file_signature()
+            try:
+                new_snapshot, summary = self._build()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                raise
+            if new_snapshot is not getattr(self.app_state, "snapshot", None):
+                self.swap(new_snapshot)
+            self._loaded_signature = signature
+            self.reloads += 1
+            self.last_error = None
+            self.last_reload_at = time.time()
+            self.last_summary = {"version": new_snapshot.version, **summary}
+            logger.info("Catalog version %s is now active (%s).", new_snapshot.version, summary.get("mode"))
+            return self.last_summary
+        finally:
+            self._reload_lock.release()
+
+    def _reload_quietly(self) -> None:
+        try:
+            self.reload()
+        except ReloadInProgressError:
+            pass
+        except Exception as e:
+            logger.warning("Catalog reload failed; keeping the current snapshot: %s", e)
+
+    def start_background_reload(self) -> bool:
+        if self.in_progress:
+            return False
+        threading.Thread(target=self._reload_quietly, name="catalog-reload", daemon=True).start()
+        return True
+
+    def _watch(self) -> None:
+        pending_signature = None
+        while not self._stop_event.wait(self.poll_interval):
+            signature = self._file_signature()
+            if signature is None or signature == self._loaded_signature:
+                pending_signature = None
+                continue
+            # Only reload once the file has stopped changing between two polls, so a copy in progress is not picked up.
+            if signature != pending_signature:
+                pending_signature = signature
+                continue
+            pending_signature = None
+            self._reload_quietly()
+
+    def start_watching(self) -> None:
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, name="catalog-watch", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.poll_interval + 1.0)
+            self._watcher = None
+
+    def status(self) -> Dict[str, Any]:
+        current_snapshot = getattr(self.app_state, "snapshot", None)
+        return {
+            "version": current_snapshot.version if current_snapshot is not None else None,
+            "loaded_at": current_snapshot.loaded_at if current_snapshot is not None else None,
+            "reloading": self.in_progress,
+            "watching": self._watcher is not None and self._watcher.is_alive(),
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+def create_catalog_reloader(app_state: Any) -> CatalogReloader:
+    catalog_reloader = CatalogReloader(app_state)
+    if config.CATALOG_WATCH_ENABLED:
+        catalog_reloader.start_watching()
+    return catalog_reloader
@@ -0,0 +1,113 @@
+import functools
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import config
+from catalog import CatalogStore
+from facets import FacetIndex, match_value_masks
+from lexical import BM25Index
+from models import AssessmentSearchCriteria
+
+logger = logging.getLogger(__name__)
+
+RERANK_FEATURES = ("similarity", "bm25", "duration_fit", "job_level_match", "retrieval_rank", "cross_encoder")
+
+def candidate_pool_size(depth: int) -> int:
+    if not config.RERANK_ENABLED:
+        return depth
+    return max(depth, config.RERANK_CANDIDATE_POOL)
+
+def distance_similarity(distance: float) -> float:
+    return 1.0 / (1.0 + max(distance, 0.0))
+
+@functools.lru_cache(maxsize=None)
+def load_feature_weights(path: Path = config.RERANK_WEIGHTS_PATH) -> np.ndarray:
+    weights = dict(config.RERANK_FEATURE_WEIGHTS)
+    if path.exists():
+        # Weights fitted offline against labelled queries override the hand-set defaults.
+        with path.open("r", encoding="utf-8") as f:
+            learned = json.load(f)
+        unknown = set(learned) - set(RERANK_FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown rerank features in {path}: {', '.join(sorted(unknown))}.")
+        weights.update({feature: float(value) for feature, value in learned.items()})
+        logger.info("Loaded rerank feature weights from %s.", path)
+    return np.asarray([weights.get(feature, 0.0) for feature in RERANK_FEATURES], dtype=np.float32)
+
+@functools.lru_cache(maxsize=None)
+def load_cross_encoder() -> Any:
+    try:
+        from sentence_transformers import CrossEncoder
+    except ImportError as e:
+        raise ValueError("Cross-encoder reranking requires the 'sentence-transformers' package.") from e
+    return CrossEncoder(config.RERANK_CROSS_ENCODER_MODEL_NAME, backend=config.RERANK_CROSS_ENCODER_BACKEND)
+
+def cross_encoder_scores(query: str, texts: Sequence[Optional[str]]) -> np.ndarray:
+    logits = load_cross_encoder().predict(
+        [(query, text or "") for text in texts],
+        batch_size=config.RERANK_CROSS_ENCODER_BATCH_SIZE,
+        show_progress_bar=False
+    )
+    return 1.0 / (1.0 + np.exp(-np.asarray(logits, dtype=np.float32)))
+
+def requested_job_levels(criteria: Optional[AssessmentSearchCriteria]) -> List[str]:
+    if criteria is None:
+        return []
+    if criteria.job_levels:
+        return criteria.job_levels
+    return [criteria.candidate_level] if criteria.candidate_level else []
+
+def candidate_features(
+    rows: Sequence[int],
+    similarities: Dict[int, float],
+    search_query: str,
+    criteria: Optional[AssessmentSearchCriteria],
+    catalog: CatalogStore,
+    lexical_index: Optional[BM25Index] = None,
+    facet_index: Optional[FacetIndex] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    positions = catalog.row_lookup.get_indexer(np.asarray(rows, dtype=np.int64))
+    found = positions >= 0
+    row_ids = np.asarray(rows, dtype=np.int64)[found]
+    positions = positions[found]
+
+    features = np.zeros((positions.shape[0], len(RERANK_FEATURES)), dtype=np.float32)
+    features[:, 0] = [similarities.get(row_index, 0.0) for row_index in row_ids.tolist()]
+    # The catalog, lexical and facet indexes are built from the same frame, so they share row positions.
+    if lexical_index is not None and positions.size:
+        bm25 = lexical_index.score(search_query)[positions]
+        if bm25.max() > 0:
+            features[:, 1] = bm25 / bm25.max()
+    if criteria is not None and criteria.max_duration_minutes:
+        durations = catalog.durations[positions]
+        limit = float(criteria.max_duration_minutes)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fit = np.where(durations <= limit, 1.0, limit / durations)
+        features[:, 2] = np.where(np.isnan(durations), 0.5, fit)
+    levels = requested_job_levels(criteria)
+    if facet_index is not None and levels:
+        level_mask = match_value_masks(facet_index.job_levels, levels, facet_index.num_rows)
+        if level_mask is not None:
+            features[:, 3] = level_mask[positions]
+    features[:, 4] = 1.0 / np.log2(np.arange(positions.shape[0]) + 2.0)
+    if config.RERANK_CROSS_ENCODER_ENABLED and "description" in catalog.columns and positions.size:
+        features[:, 5] = cross_encoder_scores(search_query, catalog.columns["description"].take(positions).tolist())
+    return row_ids, features
+
+def rerank_candidates(
+    rows: Sequence[int],
+    similarities: Dict[int, float],
+    search_query: str,
+    criteria: Optional[AssessmentSearchCriteria],
+    catalog: CatalogStore,
+    lexical_index: Optional[BM25Index] = None,
+    facet_index: Optional[FacetIndex] = None
+) -> Tuple[List[int], List[float]]:
+    row_ids, features = candidate_features(rows, similarities, search_query, criteria, catalog, lexical_index, facet_index)
+    scores = features @ load_feature_weights()
+    order = np.argsort(-scores, kind="stable")
+    return row_ids[order].tolist(), scores[order].tolist()
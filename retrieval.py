@@ -0,0 +1,58 @@
+from typing import Any, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+import config
+from ann_index import search_parameters
+from index_store import position_row_ids
+
+def embed_search_queries(embedding_model: Any, texts: Sequence[str]) -> np.ndarray:
+    vectors = []
+    batch_size = config.EMBEDDING_BATCH_SIZE
+    for start in range(0, len(texts), batch_size):
+        batch = list(texts[start:start + batch_size])
+        # Cohere v3 models embed queries and documents differently; use the query
+        # input type when the backend supports it so batched vectors match embed_query.
+        if hasattr(embedding_model, "embed"):
+            vectors.extend(embedding_model.embed(batch, input_type="search_query"))
+        else:
+            vectors.extend(embedding_model.embed_documents(batch))
+    return np.asarray(vectors, dtype=np.float32)
+
+def search_vectors(
+    vectorstore: FAISS,
+    vectors: np.ndarray,
+    k: int,
+    allowed_row_ids: Optional[np.ndarray] = None
+) -> List[List[Tuple[int, float]]]:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    if vectorstore._normalize_L2:
+        vectors = vectors.copy()
+        faiss.normalize_L2(vectors)
+
+    row_ids = position_row_ids(vectorstore)
+    search_params = None
+    if allowed_row_ids is not None:
+        allowed_positions = np.flatnonzero(np.isin(row_ids, allowed_row_ids)).astype(np.int64)
+        if allowed_positions.size == 0:
+            return [[] for _ in range(vectors.shape[0])]
+        # Restrict the scan to matching ids inside FAISS instead of over-fetching and post-filtering.
+        selector = faiss.IDSelectorBatch(allowed_positions)
+        search_params = search_parameters(vectorstore.index, selector)
+        k = min(k, int(allowed_positions.size))
+
+    distances, positions = vectorstore.index.search(vectors, k, params=search_params)
+    results = []
+    for row_distances, row_positions in zip(distances, positions):
+        found = row_positions >= 0
+        hit_rows = row_ids[row_positions[found]]
+        results.append([
+            (int(row_index), float(distance))
+            for row_index, distance in zip(hit_rows.tolist(), row_distances[found].tolist())
+            if row_index >= 0
+        ])
+    return results
@@ -1,151 +1,912 @@
+import asyncio
+import json
+import logging
+import time
+import numpy as np
 import pandas as pd
-import re
 from langchain.schema import Document
-from langchain_community.embeddings import CohereEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_community.vectorstores import FAISS
 from langchain_groq import ChatGroq
 from langchain.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
 import os
-from typing import List, Optional, Dict, Any, Tuple
+from pathlib import Path
+from typing import AsyncIterator, Iterator, List, NamedTuple, Optional, Dict, Any, Tuple
 import config
 from models import RecommendedAssessment, AssessmentSearchCriteria
-from helpers import construct_search_query_from_structured
+from embeddings import create_embedding_model
+from helpers import construct_search_query_from_structured, reciprocal_rank_fusion
+from caches import QueryAnalysisCache, SemanticResultCache
+from concurrency import StageTimeoutError, run_blocking, with_timeout
+from retrieval import embed_search_queries, search_vectors
+from metrics import CACHE_EVENTS, LLM_FALLBACKS, RERANK_FALLBACKS, record_stage, stage_span
+from batching import RetrievalBatcher
+from lexical import BM25Index, create_lexical_index
+from facets import FacetIndex, FacetSelection, catalog_facet_vocabulary, create_facet_index
+from catalog import CatalogStore
+from reranking import candidate_pool_size, distance_similarity, load_cross_encoder, rerank_candidates
+from ann_index import build_ann_index
+from index_store import (
+    build_manifest,
+    compute_file_hash,
+    compute_text_hash,
+    index_build_lock,
+    index_entry,
+    load_components,
+    load_index,
+    manifest_compatible,
+    manifest_matches,
+    read_manifest,
+    read_row_hashes,
+    save_components,
+    save_index,
+    serving_vectorstore,
+    with_index,
+)
 
 load_dotenv()
-COHERE_API_KEY = os.getenv("COHERE_API_KEY")
+logger = logging.getLogger(__name__)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
-df: Optional[pd.DataFrame] = None
-vectorstore: Optional[FAISS] = None
-retriever: Optional[Any] = None
-structured_chain: Optional[Any] = None
-embedding_model: Optional[CohereEmbeddings] = None
+class CatalogSnapshot(NamedTuple):
+    version: str
+    catalog: CatalogStore
+    retriever: Any
+    structured_chain: Any
+    lexical_index: Optional[BM25Index]
+    facet_index: Optional[FacetIndex]
+    loaded_at: float
+    analysis_fingerprint: str = ""
+
+class RetrievedCandidates(NamedTuple):
+    rows: List[int]
+    similarities: Dict[int, float]
+    search_query: str
+    criteria: Optional[AssessmentSearchCriteria] = None
+    fallback: Optional[str] = None
+
+class RankedRows(NamedTuple):
+    rows: List[int]
+    scores: Optional[List[float]] = None
+
+class RecommendationEvent(NamedTuple):
+    phase: str
+    recommendation: Optional[RecommendedAssessment] = None
+    rank: Optional[int] = None
+    fallback: Optional[str] = None
+
+snapshot: Optional[CatalogSnapshot] = None
+embedding_model: Optional[Embeddings] = None
 llm: Optional[ChatGroq] = None
 
-def initialize_components() -> Tuple[pd.DataFrame, Any, Any, Any, CohereEmbeddings]:
-    global df, vectorstore, retriever, structured_chain, embedding_model, llm
+def read_catalog_table(catalog_path: Path) -> pd.DataFrame:
+    suffix = catalog_path.suffix.lower()
+    try:
+        if suffix in config.CATALOG_PARQUET_SUFFIXES:
+            return pd.read_parquet(catalog_path)
+        if suffix in config.CATALOG_ARROW_SUFFIXES:
+            return pd.read_feather(catalog_path)
+    except ImportError as e:
+        raise ValueError(f"Reading '{suffix}' catalogs requires the 'pyarrow' package.") from e
+    return pd.read_csv(catalog_path)
+
+def load_catalog_dataframe(csv_path: Path) -> pd.DataFrame:
+    if not csv_path.exists():
+        raise FileNotFoundError(f"Catalog file not found: {csv_path}")
+    temp_df = read_catalog_table(csv_path)
+    facet_cols = [col for col in config.FACET_CSV_COLS if col in temp_df.columns]
+    local_df = temp_df[config.EXPECTED_CSV_COLS + facet_cols].copy()
+    duration_col = config.JSON_FIELD_TO_CSV_COL["duration"]
+    text_cols = [col for col in local_df.columns if col != duration_col]
+    local_df[text_cols] = local_df[text_cols].fillna('').astype(str)
+    local_df[duration_col] = pd.to_numeric(
+        local_df[duration_col].astype(str).str.extract(r'(\d+)', expand=False),
+        errors="coerce"
+    )
+    return local_df
+
+def document_contents(local_df: pd.DataFrame) -> pd.Series:
+    contents = pd.Series("", index=local_df.index, dtype=object)
+    for col in config.CONTENT_CSV_COLS:
+        if col not in local_df.columns:
+            continue
+        values = local_df[col].fillna("").astype(str)
+        present = values.str.strip().ne("")
+        joined = contents.where(contents.eq(""), contents + "\n") + f"{col}: " + values
+        contents = joined.where(present, contents)
+    fallback = "Assessment details row index " + local_df.index.astype(str)
+    return contents.where(contents.ne(""), pd.Series(fallback, index=local_df.index))
+
+def document_keys(local_df: pd.DataFrame) -> List[str]:
+    url_col = config.JSON_FIELD_TO_CSV_COL["url"]
+    row_labels = pd.Series(local_df.index.astype(str), index=local_df.index)
+    urls = local_df[url_col].fillna("").astype(str) if url_col in local_df.columns else pd.Series("", index=local_df.index)
+    keys = urls.where(urls.ne(""), "row-" + row_labels)
+    return keys.where(~keys.duplicated(), keys + "#" + row_labels).tolist()
+
+def iter_documents(
+    local_df: pd.DataFrame,
+    chunk_size: int = config.CATALOG_DOCUMENT_CHUNK_SIZE
+) -> Iterator[Tuple[List[str], List[Document]]]:
+    keys = document_keys(local_df)
+    for start in range(0, len(local_df), chunk_size):
+        chunk = local_df.iloc[start:start + chunk_size]
+        # Catalog fields are served from the CatalogStore, so documents only carry their row id.
+        docs = [
+            Document(page_content=page_content, metadata={"row_index": int(row_index)})
+            for page_content, row_index in zip(document_contents(chunk).tolist(), chunk.index)
+        ]
+        yield keys[start:start + chunk_size], docs
+
+def build_documents(local_df: pd.DataFrame) -> Tuple[List[str], List[Document]]:
+    keys: List[str] = []
+    docs: List[Document] = []
+    for chunk_keys, chunk_docs in iter_documents(local_df):
+        keys.extend(chunk_keys)
+        docs.extend(chunk_docs)
+    if not docs:
+        raise ValueError("Failed to create any documents for vector store.")
+    return keys, docs
+
+def add_document_embeddings(
+    target_vectorstore: Optional[FAISS],
+    keys: List[str],
+    docs: List[Document],
+    embedding_model: Embeddings
+) -> Optional[FAISS]:
+    batch_size = config.EMBEDDING_BATCH_SIZE
+    for start in range(0, len(docs), batch_size):
+        batch_keys = keys[start:start + batch_size]
+        batch_docs = docs[start:start + batch_size]
+        embeddings = embedding_model.embed_documents([doc.page_content for doc in batch_docs])
+        entries = [index_entry(doc.metadata["row_index"]) for doc in batch_docs]
+        text_embeddings = [(entry.page_content, embedding) for entry, embedding in zip(entries, embeddings)]
+        metadatas = [entry.metadata for entry in entries]
+        if target_vectorstore is None:
+            target_vectorstore = FAISS.from_embeddings(text_embeddings, embedding_model, metadatas=metadatas, ids=batch_keys)
+        else:
+            target_vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=batch_keys)
+    return target_vectorstore
+
+def compute_row_hashes(docs: List[Document], keys: List[str]) -> Dict[str, str]:
+    return {key: compute_text_hash(doc.page_content) for key, doc in zip(keys, docs)}
+
+def apply_incremental_update(
+    target_vectorstore: FAISS,
+    keys: List[str],
+    docs: List[Document],
+    stored_hashes: Dict[str, str],
+    embedding_model: Embeddings
+) -> Tuple[Optional[Dict[str, str]], Dict[str, int]]:
+    indexed_keys = set(target_vectorstore.index_to_docstore_id.values())
+    if len(indexed_keys) != len(stored_hashes) or not indexed_keys.issuperset(stored_hashes):
+        return None, {}
+
+    new_hashes = compute_row_hashes(docs, keys)
+    docs_by_key = dict(zip(keys, docs))
+
+    removed = [key for key in stored_hashes if key not in new_hashes]
+    modified = [key for key in keys if key in stored_hashes and stored_hashes[key] != new_hashes[key]]
+    added = [key for key in keys if key not in stored_hashes]
+    unchanged = [key for key in keys if stored_hashes.get(key) == new_hashes[key]]
+
+    if removed or modified:
+        target_vectorstore.delete(removed + modified)
+
+    to_embed = added + modified
+    add_document_embeddings(target_vectorstore, to_embed, [docs_by_key[key] for key in to_embed], embedding_model)
+
+    # Unchanged rows keep their vectors, but their row index may have moved,
+    # so the docstore entry is refreshed in place.
+    for key in unchanged:
+        entry = index_entry(docs_by_key[key].metadata["row_index"])
+        if target_vectorstore.docstore.search(key).metadata != entry.metadata:
+            target_vectorstore.docstore.delete([key])
+            target_vectorstore.docstore.add({key: entry})
+
+    summary = {
+        "added": len(added),
+        "modified": len(modified),
+        "removed": len(removed),
+        "unchanged": len(unchanged),
+        "embedded": len(to_embed),
+    }
+    return new_hashes, summary
+
+def build_full_vectorstore(
+    local_df: pd.DataFrame,
+    embedding_model: Embeddings
+) -> Tuple[FAISS, Dict[str, str]]:
+    built_vectorstore = None
+    row_hashes: Dict[str, str] = {}
+    # Chunks are embedded as they are produced, so the full document list never has to exist at once.
+    for keys, docs in iter_documents(local_df):
+        built_vectorstore = add_document_embeddings(built_vectorstore, keys, docs, embedding_model)
+        row_hashes.update(compute_row_hashes(docs, keys))
+    if built_vectorstore is None:
+        raise ValueError("Failed to create any documents for vector store.")
+    return built_vectorstore, row_hashes
+
+def finalize_vectorstore(
+    exact_vectorstore: FAISS,
+    index_dir: Path,
+    manifest: Dict[str, Any],
+    row_hashes: Dict[str, str]
+) -> FAISS:
+    indexed_vectorstore = with_index(exact_vectorstore, build_ann_index(exact_vectorstore.index))
+    # Approximate indexes cannot be edited row by row, so the exact vectors are kept for the next incremental refresh.
+    exact_index = exact_vectorstore.index if indexed_vectorstore.index is not exact_vectorstore.index else None
+    try:
+        save_index(indexed_vectorstore, index_dir, manifest, row_hashes=row_hashes, exact_index=exact_index)
+    except OSError as e:
+        logger.warning("Could not persist index artifact to %s: %s", index_dir, e)
+    return serving_vectorstore(indexed_vectorstore)
+
+def load_or_build_vectorstore(
+    local_df: pd.DataFrame,
+    embedding_model: Embeddings,
+    csv_path: Path,
+    index_dir: Path = config.INDEX_DIR,
+    force_rebuild: bool = False
+) -> FAISS:
+    manifest = build_manifest(csv_path)
+    if not force_rebuild:
+        loaded_vectorstore = load_index(index_dir, embedding_model, manifest)
+        if loaded_vectorstore is not None:
+            return loaded_vectorstore
+
+    # Only one process builds; the others wait here and then load what it persisted.
+    with index_build_lock(index_dir):
+        return build_or_update_vectorstore(local_df, embedding_model, manifest, index_dir, force_rebuild)
+
+def build_or_update_vectorstore(
+    local_df: pd.DataFrame,
+    embedding_model: Embeddings,
+    manifest: Dict[str, Any],
+    index_dir: Path,
+    force_rebuild: bool = False
+) -> FAISS:
+    if not force_rebuild:
+        loaded_vectorstore = load_index(index_dir, embedding_model, manifest)
+        if loaded_vectorstore is not None:
+            return loaded_vectorstore
+
+        stored_hashes = read_row_hashes(index_dir)
+        stale_vectorstore = None
+        if stored_hashes is not None:
+            stale_vectorstore = load_index(
+                index_dir, embedding_model, manifest, use_mmap=False, require_exact=False, exact_vectors=True
+            )
+        if stale_vectorstore is not None:
+            keys, docs = build_documents(local_df)
+            new_hashes, _ = apply_incremental_update(stale_vectorstore, keys, docs, stored_hashes, embedding_model)
+            if new_hashes is not None:
+                return finalize_vectorstore(stale_vectorstore, index_dir, manifest, new_hashes)
 
-    local_df = None
-    local_vectorstore = None
-    local_retriever = None
-    local_structured_chain = None
+    built_vectorstore, row_hashes = build_full_vectorstore(local_df, embedding_model)
+    return finalize_vectorstore(built_vectorstore, index_dir, manifest, row_hashes)
+
+def refresh_vectorstore(
+    embedding_model: Embeddings,
+    csv_path: Path,
+    index_dir: Path = config.INDEX_DIR
+) -> Tuple[pd.DataFrame, FAISS, Dict[str, Any]]:
+    with index_build_lock(index_dir):
+        local_df = load_catalog_dataframe(csv_path)
+        manifest = build_manifest(csv_path)
+        stored_hashes = read_row_hashes(index_dir)
+
+        updated_vectorstore = None
+        if stored_hashes is not None and manifest_compatible(read_manifest(index_dir), manifest):
+            updated_vectorstore = load_index(
+                index_dir, embedding_model, manifest, use_mmap=False, require_exact=False, exact_vectors=True
+            )
+        if updated_vectorstore is not None:
+            keys, docs = build_documents(local_df)
+            new_hashes, summary = apply_incremental_update(updated_vectorstore, keys, docs, stored_hashes, embedding_model)
+            if new_hashes is not None:
+                serving_vectorstore = finalize_vectorstore(updated_vectorstore, index_dir, manifest, new_hashes)
+                return local_df, serving_vectorstore, {"mode": "incremental", **summary}
+
+        built_vectorstore, row_hashes = build_full_vectorstore(local_df, embedding_model)
+        serving_vectorstore = finalize_vectorstore(built_vectorstore, index_dir, manifest, row_hashes)
+        return local_df, serving_vectorstore, {"mode": "full", "embedded": len(row_hashes)}
+
+def catalog_version(csv_path: Path) -> str:
+    return compute_file_hash(csv_path)[:12]
+
+def assemble_snapshot(
+    version: str,
+    local_catalog: CatalogStore,
+    local_vectorstore: FAISS,
+    llm_ref: ChatGroq,
+    lexical_index: Optional[BM25Index],
+    facet_index: Optional[FacetIndex],
+    facet_vocabulary: Dict[str, List[str]]
+) -> CatalogSnapshot:
+    structured_prompt = build_structured_prompt(facet_vocabulary)
+    return CatalogSnapshot(
+        version=version,
+        catalog=local_catalog,
+        retriever=local_vectorstore.as_retriever(search_kwargs={'k': candidate_pool_size(config.NUM_DOCS_TO_RETRIEVE)}),
+        structured_chain=structured_prompt | llm_ref.with_structured_output(AssessmentSearchCriteria),
+        lexical_index=lexical_index,
+        facet_index=facet_index,
+        loaded_at=time.time(),
+        analysis_fingerprint=analysis_fingerprint(structured_prompt)
+    )
+
+def build_snapshot(
+    local_df: pd.DataFrame,
+    local_vectorstore: FAISS,
+    llm_ref: ChatGroq,
+    version: str
+) -> CatalogSnapshot:
+    return assemble_snapshot(
+        version,
+        CatalogStore.from_dataframe(local_df),
+        local_vectorstore,
+        llm_ref,
+        create_lexical_index(local_df),
+        create_facet_index(local_df),
+        catalog_facet_vocabulary(local_df)
+    )
+
+def build_shared_components(local_df: pd.DataFrame) -> Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]]:
+    components = {
+        "catalog": CatalogStore.from_dataframe(local_df).to_arrays(),
+        "vocabulary": ({}, catalog_facet_vocabulary(local_df)),
+    }
+    lexical_index = create_lexical_index(local_df)
+    if lexical_index is not None:
+        components["lexical"] = lexical_index.to_arrays()
+    facet_index = create_facet_index(local_df)
+    if facet_index is not None:
+        components["facets"] = facet_index.to_arrays()
+    return components
+
+def snapshot_from_components(
+    version: str,
+    local_vectorstore: FAISS,
+    components: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]],
+    llm_ref: ChatGroq
+) -> CatalogSnapshot:
+    lexical_index = None
+    if config.HYBRID_RETRIEVAL_ENABLED and "lexical" in components:
+        lexical_index = BM25Index.from_arrays(*components["lexical"])
+    facet_index = None
+    if config.FACET_FILTERING_ENABLED and "facets" in components:
+        facet_index = FacetIndex.from_arrays(*components["facets"])
+    return assemble_snapshot(
+        version,
+        CatalogStore.from_arrays(*components["catalog"]),
+        local_vectorstore,
+        llm_ref,
+        lexical_index,
+        facet_index,
+        components["vocabulary"][1]
+    )
+
+def load_shared_snapshot(
+    embedding_model_ref: Embeddings,
+    llm_ref: ChatGroq,
+    csv_path: Path = config.CSV_FILE_PATH,
+    index_dir: Path = config.INDEX_DIR
+) -> Tuple[CatalogSnapshot, Dict[str, Any]]:
+    version = catalog_version(csv_path)
+    manifest = build_manifest(csv_path)
+    with index_build_lock(index_dir, exclusive=False):
+        local_vectorstore = load_index(index_dir, embedding_model_ref, manifest)
+        components = load_components(index_dir, manifest) if local_vectorstore is not None else None
+    if local_vectorstore is not None and components is not None:
+        return snapshot_from_components(version, local_vectorstore, components, llm_ref), {"mode": "mapped"}
+
+    with index_build_lock(index_dir):
+        # Another worker may have finished the build while this one waited for the lock.
+        local_vectorstore = load_index(index_dir, embedding_model_ref, manifest)
+        components = load_components(index_dir, manifest)
+        if local_vectorstore is not None and components is not None:
+            return snapshot_from_components(version, local_vectorstore, components, llm_ref), {"mode": "mapped"}
+
+        local_df = load_catalog_dataframe(csv_path)
+        built_vectorstore = build_or_update_vectorstore(local_df, embedding_model_ref, manifest, index_dir)
+        built_components = build_shared_components(local_df)
+        try:
+            save_components(index_dir, manifest, built_components)
+        except OSError as e:
+            logger.warning("Could not persist shared catalog components to %s: %s", index_dir, e)
+        # Serve from the mapped files like every other worker, unless they could not be written.
+        local_vectorstore = load_index(index_dir, embedding_model_ref, manifest)
+        if local_vectorstore is None:
+            local_vectorstore = built_vectorstore
+        components = load_components(index_dir, manifest)
+        if components is None:
+            components = built_components
+    return snapshot_from_components(version, local_vectorstore, components, llm_ref), {"mode": "built"}
+
+def refresh_components(
+    current_snapshot: Optional[CatalogSnapshot],
+    embedding_model_ref: Embeddings,
+    llm_ref: ChatGroq,
+    csv_path: Path = config.CSV_FILE_PATH
+) -> Tuple[CatalogSnapshot, Dict[str, Any]]:
+    global snapshot
+
+    version = catalog_version(csv_path)
+    if (
+        current_snapshot is not None
+        and current_snapshot.version == version
+        and manifest_matches(read_manifest(config.INDEX_DIR), build_manifest(csv_path))
+    ):
+        # A touch or a repeated refresh request must not rewrite the artifact or retrain an approximate index.
+        return current_snapshot, {"mode": "unchanged"}
+
+    if config.SHARED_INDEX_ENABLED:
+        snapshot, summary = load_shared_snapshot(embedding_model_ref, llm_ref, csv_path)
+        return snapshot, summary
+
+    local_df, local_vectorstore, summary = refresh_vectorstore(embedding_model_ref, csv_path)
+    local_snapshot = build_snapshot(local_df, local_vectorstore, llm_ref, version)
+
+    snapshot = local_snapshot
+    return local_snapshot, summary
+
+def build_structured_prompt(facet_vocabulary: Dict[str, List[str]]) -> ChatPromptTemplate:
+    structured_prompt = ChatPromptTemplate.from_messages([
+        ("system", (
+            "You are an expert query analyst specializing in job assessment matching. "
+            "Analyze the user's request and extract the primary job role, candidate level, "
+            "and key skills or concepts relevant to the role. "
+            "Also extract hard constraints, but only when the user states them explicitly: "
+            "a maximum duration in minutes, required test types, whether remote testing or adaptive/IRT "
+            "support is required, target job levels, and required languages. "
+            "Leave a constraint empty when it is not clearly requested. "
+            "When filling test_types, job_levels or languages, use values from this catalog vocabulary:\n"
+            "{facet_vocabulary}"
+        )),
+        ("human", "Analyze the following user query:\n\nQuery: ```{original_query}```"),
+    ])
+    vocabulary_text = "\n".join(
+        f"- {facet}: {', '.join(values)}" for facet, values in facet_vocabulary.items() if values
+    )
+    return structured_prompt.partial(facet_vocabulary=vocabulary_text)
+
+def analysis_fingerprint(structured_prompt: ChatPromptTemplate) -> str:
+    # Cached criteria are only valid for the prompt (including its facet vocabulary) and schema that produced them.
+    prompt_text = structured_prompt.format(original_query="")
+    schema_text = json.dumps(AssessmentSearchCriteria.model_json_schema(), sort_keys=True)
+    return compute_text_hash(f"{prompt_text}\x1f{schema_text}")[:16]
+
+def initialize_components(csv_path: Path = config.CSV_FILE_PATH) -> Tuple[CatalogSnapshot, ChatGroq, Embeddings]:
+    global snapshot, embedding_model, llm
+
+    local_snapshot = None
     local_embedding_model = None
     local_llm = None
 
     try:
         if not GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY not found.")
-        if not COHERE_API_KEY:
-            raise ValueError("COHERE_API_KEY not found.")
-
-        csv_path = config.CSV_FILE_PATH
-        if not csv_path.exists():
-            raise FileNotFoundError(f"CSV file not found: {csv_path}")
-        temp_df = pd.read_csv(csv_path)
-        local_df = temp_df[config.EXPECTED_CSV_COLS].copy()
-        for col in local_df.columns:
-            if col == "Assessment Length":
-                local_df[col] = local_df[col].apply(lambda x: int(re.search(r'\d+', str(x)).group(0)) if pd.notna(x) and re.search(r'\d+', str(x)) else None)
-            else:
-                local_df[col] = local_df[col].fillna('').astype(str)
-        df = local_df
-
-        docs = []
-        for i, row in local_df.iterrows():
-            content_parts = []
-            for col in config.CONTENT_CSV_COLS:
-                if col in row and pd.notna(row[col]) and str(row[col]).strip():
-                    content_parts.append(f"{col}: {row[col]}")
-            page_content = "\n".join(content_parts) if content_parts else f"Assessment details row index {i}"
-            metadata = {"row_index": i}
-            for csv_col in config.METADATA_CSV_COLS:
-                meta_key = config.TARGET_FIELD_TO_METADATA_KEY.get(config.CSV_TO_JSON_MAP.get(csv_col))
-                if meta_key:
-                    value = row.get(csv_col)
-                    metadata[meta_key] = None if pd.isna(value) else value
-            docs.append(Document(page_content=page_content, metadata=metadata))
-        if not docs:
-            raise ValueError("Failed to create any documents for vector store.")
-
-        local_embedding_model = CohereEmbeddings(
-            cohere_api_key=COHERE_API_KEY,
-            model=config.COHERE_EMBEDDING_MODEL_NAME,
-            user_agent="langchain"
-        )
-        embedding_model = local_embedding_model
 
-        local_vectorstore = FAISS.from_documents(docs, local_embedding_model)
-        local_retriever = local_vectorstore.as_retriever(search_kwargs={'k': config.NUM_DOCS_TO_RETRIEVE})
-        vectorstore = local_vectorstore
-        retriever = local_retriever
+        local_embedding_model = create_embedding_model()
+        embedding_model = local_embedding_model
 
         local_llm = ChatGroq(temperature=0, groq_api_key=GROQ_API_KEY, model_name=config.LLM_MODEL_NAME)
         llm = local_llm
 
-        structured_prompt = ChatPromptTemplate.from_messages([
-            ("system", (
-                "You are an expert query analyst specializing in job assessment matching. "
-                "Analyze the user's request and extract the primary job role, candidate level, "
-                "and key skills or concepts relevant to the role. "
-                "Focus exclusively on these aspects. "
-                "Ignore mentions of duration, test types, or preferences unless essential to job requirements. "
-                "Use the provided JSON schema, filling only job_role, candidate_level, and key_skills_or_concepts."
-            )),
-            ("human", "Analyze the following user query:\n\nQuery: ```{original_query}```"),
-        ])
-        local_structured_chain = structured_prompt | local_llm.with_structured_output(AssessmentSearchCriteria)
-        structured_chain = local_structured_chain
-
-        return local_df, local_retriever, local_structured_chain, local_llm, local_embedding_model
+        if config.RERANK_ENABLED and config.RERANK_CROSS_ENCODER_ENABLED:
+            load_cross_encoder()
+
+        if config.SHARED_INDEX_ENABLED:
+            local_snapshot, _ = load_shared_snapshot(local_embedding_model, local_llm, csv_path)
+        else:
+            version = catalog_version(csv_path)
+            local_df = load_catalog_dataframe(csv_path)
+            local_vectorstore = load_or_build_vectorstore(local_df, local_embedding_model, csv_path)
+            local_snapshot = build_snapshot(local_df, local_vectorstore, local_llm, version)
+        snapshot = local_snapshot
+
+        return local_snapshot, local_llm, local_embedding_model
 
     except Exception as e:
-        df, vectorstore, retriever, structured_chain, embedding_model, llm = None, None, None, None, None, None
+        snapshot, embedding_model, llm = None, None, None
         raise e
 
-async def get_recommendations(
+async def analyze_query(
     query: str,
-    df_ref: pd.DataFrame,
+    structured_chain_ref: Any,
+    analysis_cache: Optional[QueryAnalysisCache] = None,
+    cache_namespace: Optional[str] = None
+) -> Optional[AssessmentSearchCriteria]:
+    if analysis_cache is not None:
+        cached_result = await analysis_cache.get(query, cache_namespace)
+        CACHE_EVENTS.inc("analysis", "miss" if cached_result is None else "hit")
+        if cached_result is not None:
+            return cached_result
+
+    with stage_span("llm"):
+        structured_result: Optional[AssessmentSearchCriteria] = await with_timeout(
+            structured_chain_ref.ainvoke({"original_query": query}),
+            config.LLM_TIMEOUT_SECONDS,
+            "llm"
+        )
+    if analysis_cache is not None and structured_result is not None:
+        analysis_cache.put(query, structured_result, cache_namespace)
+    return structured_result
+
+def build_search_query(structured_result: Optional[AssessmentSearchCriteria], query: str) -> Optional[str]:
+    if structured_result and (structured_result.job_role or structured_result.candidate_level or structured_result.key_skills_or_concepts):
+        return construct_search_query_from_structured(structured_result, compact=config.HYBRID_RETRIEVAL_ENABLED)
+    return None
+
+async def retrieve_hits(
     retriever_ref: Any,
-    structured_chain_ref: Any
+    search_query: str,
+    batcher: Optional[RetrievalBatcher] = None,
+    selection: Optional[FacetSelection] = None,
+    query_vector: Optional[List[float]] = None
+) -> List[Tuple[int, float]]:
+    k = retriever_ref.search_kwargs.get('k', config.NUM_DOCS_TO_RETRIEVE)
+    allowed_row_ids = selection.row_ids if selection is not None else None
+    if query_vector is None and batcher is not None:
+        batched = await with_timeout(
+            batcher.retrieve(retriever_ref.vectorstore, search_query, k, allowed_row_ids),
+            config.RETRIEVAL_TIMEOUT_SECONDS, "retrieval"
+        )
+        record_stage("embedding", batched.embedding_seconds)
+        record_stage("retrieval", batched.search_seconds)
+        return batched.hits
+    if query_vector is None:
+        with stage_span("embedding"):
+            query_vector = await run_blocking(
+                retriever_ref.vectorstore.embedding_function.embed_query, search_query,
+                timeout=config.EMBEDDING_TIMEOUT_SECONDS, stage="embedding"
+            )
+    with stage_span("retrieval"):
+        hits = await run_blocking(
+            search_vectors, retriever_ref.vectorstore, query_vector, k, allowed_row_ids,
+            timeout=config.RETRIEVAL_TIMEOUT_SECONDS, stage="retrieval"
+        )
+    return hits[0]
+
+def hit_rows(hits: List[Tuple[int, float]]) -> List[int]:
+    rows = []
+    seen = set()
+    for row_index, _ in hits:
+        if row_index not in seen:
+            seen.add(row_index)
+            rows.append(row_index)
+    return rows
+
+def hit_similarities(hits: List[Tuple[int, float]]) -> Dict[int, float]:
+    similarities: Dict[int, float] = {}
+    for row_index, distance in hits:
+        similarities.setdefault(row_index, distance_similarity(distance))
+    return similarities
+
+def fuse_with_lexical(
+    dense_rows: List[int],
+    search_query: str,
+    lexical_index: Optional[BM25Index],
+    selection: Optional[FacetSelection] = None
+) -> List[int]:
+    if lexical_index is None:
+        return dense_rows
+    allowed_docs = selection.positions if selection is not None else None
+    with stage_span("lexical"):
+        lexical_rows = [row_index for row_index, _ in lexical_index.search(search_query, candidate_pool_size(config.LEXICAL_TOP_K), allowed_docs)]
+    return reciprocal_rank_fusion(
+        [dense_rows, lexical_rows],
+        weights=[config.DENSE_RETRIEVAL_WEIGHT, config.LEXICAL_RETRIEVAL_WEIGHT]
+    )
+
+async def retrieve_candidates(
+    retriever_ref: Any,
+    search_query: str,
+    batcher: Optional[RetrievalBatcher] = None,
+    lexical_index: Optional[BM25Index] = None,
+    selection: Optional[FacetSelection] = None,
+    criteria: Optional[AssessmentSearchCriteria] = None,
+    query_vector: Optional[List[float]] = None
+) -> RetrievedCandidates:
+    hits = await retrieve_hits(retriever_ref, search_query, batcher, selection, query_vector)
+    rows = fuse_with_lexical(hit_rows(hits), search_query, lexical_index, selection)
+    return RetrievedCandidates(rows, hit_similarities(hits), search_query, criteria)
+
+def select_rows(facet_index: Optional[FacetIndex], structured_result: Optional[AssessmentSearchCriteria]) -> Optional[FacetSelection]:
+    if facet_index is None:
+        return None
+    with stage_span("facets"):
+        return facet_index.select(structured_result)
+
+def fallback_reason(error: BaseException) -> str:
+    return "timeout" if isinstance(error, StageTimeoutError) else "error"
+
+def _discard_task_result(task: "asyncio.Task") -> None:
+    if not task.cancelled():
+        task.exception()
+
+async def retrieve_with_latency_budget(
+    query: str,
+    snapshot_ref: CatalogSnapshot,
+    analysis_cache: Optional[QueryAnalysisCache] = None,
+    batcher: Optional[RetrievalBatcher] = None,
+    query_vector: Optional[List[float]] = None
+) -> RetrievedCandidates:
+    retriever_ref, lexical_index = snapshot_ref.retriever, snapshot_ref.lexical_index
+    raw_task = asyncio.create_task(retrieve_candidates(retriever_ref, query, batcher, lexical_index, query_vector=query_vector))
+    analysis_task = asyncio.create_task(analyze_query(query, snapshot_ref.structured_chain, analysis_cache, snapshot_ref.analysis_fingerprint))
+    budget = config.LLM_LATENCY_BUDGET_SECONDS
+
+    try:
+        structured_result = await asyncio.wait_for(asyncio.shield(analysis_task), budget)
+    except asyncio.TimeoutError:
+        # Let the analysis finish in the background so its result still lands in the cache.
+        analysis_task.add_done_callback(_discard_task_result)
+        LLM_FALLBACKS.inc("latency_budget")
+        logger.warning("LLM query analysis exceeded the %.2fs latency budget; serving raw-query results.", budget)
+        return (await raw_task)._replace(fallback="latency_budget")
+    except Exception as e:
+        LLM_FALLBACKS.inc(fallback_reason(e))
+        logger.warning("LLM query analysis failed (%s); serving raw-query results.", e)
+        return (await raw_task)._replace(fallback=fallback_reason(e))
+
+    refined_query = build_search_query(structured_result, query)
+    selection = select_rows(snapshot_ref.facet_index, structured_result)
+    if refined_query is None and selection is None:
+        return (await raw_task)._replace(criteria=structured_result)
+
+    refined = await retrieve_candidates(
+        retriever_ref, refined_query or query, batcher, lexical_index, selection, structured_result,
+        query_vector=None if refined_query else query_vector
+    )
+    if not config.MERGE_RAW_QUERY_RESULTS:
+        raw_task.add_done_callback(_discard_task_result)
+        return refined
+    return merge_raw_candidates(refined, await raw_task, selection)
+
+def merge_raw_candidates(
+    refined: RetrievedCandidates,
+    raw: RetrievedCandidates,
+    selection: Optional[FacetSelection]
+) -> RetrievedCandidates:
+    raw_rows = raw.rows
+    if selection is not None:
+        allowed_rows = set(selection.row_ids.tolist())
+        raw_rows = [row_index for row_index in raw_rows if row_index in allowed_rows]
+    rows = reciprocal_rank_fusion([refined.rows, raw_rows], weights=[1.0, config.RAW_QUERY_RESULTS_WEIGHT])
+    similarities = dict(raw.similarities)
+    for row_index, similarity in refined.similarities.items():
+        similarities[row_index] = max(similarity, similarities.get(row_index, 0.0))
+    return refined._replace(rows=rows, similarities=similarities)
+
+async def retrieve_sequentially(
+    query: str,
+    snapshot_ref: CatalogSnapshot,
+    analysis_cache: Optional[QueryAnalysisCache] = None,
+    batcher: Optional[RetrievalBatcher] = None,
+    query_vector: Optional[List[float]] = None
+) -> RetrievedCandidates:
+    structured_result = await analyze_query(query, snapshot_ref.structured_chain, analysis_cache, snapshot_ref.analysis_fingerprint)
+    refined_query = build_search_query(structured_result, query)
+    selection = select_rows(snapshot_ref.facet_index, structured_result)
+    return await retrieve_candidates(
+        snapshot_ref.retriever, refined_query or query, batcher, snapshot_ref.lexical_index, selection, structured_result,
+        query_vector=None if refined_query else query_vector
+    )
+
+async def rerank_with_budget(candidates: RetrievedCandidates, snapshot_ref: CatalogSnapshot) -> RankedRows:
+    if not config.RERANK_ENABLED or not candidates.rows:
+        return RankedRows(candidates.rows)
+    try:
+        with stage_span("rerank"):
+            ranked_rows, scores = await run_blocking(
+                rerank_candidates, candidates.rows, candidates.similarities, candidates.search_query, candidates.criteria,
+                snapshot_ref.catalog, snapshot_ref.lexical_index, snapshot_ref.facet_index,
+                timeout=config.RERANK_LATENCY_BUDGET_SECONDS, stage="rerank"
+            )
+    except Exception as e:
+        RERANK_FALLBACKS.inc(fallback_reason(e))
+        logger.warning("Reranking failed (%s); serving results in retrieval order.", e)
+        return RankedRows(candidates.rows)
+    return RankedRows(ranked_rows, scores)
+
+def assemble_recommendations(ranked: RankedRows, catalog_ref: CatalogStore) -> List[RecommendedAssessment]:
+    with stage_span("assembly"):
+        return catalog_ref.recommendations(ranked.rows, limit=config.NUM_DOCS_TO_RETURN, scores=ranked.scores)
+
+async def embed_query_for_cache(query: str, embedding_model_ref: Any, batcher: Optional[RetrievalBatcher] = None) -> List[float]:
+    with stage_span("embedding"):
+        if batcher is not None:
+            return await with_timeout(
+                batcher.embed(embedding_model_ref, query),
+                config.EMBEDDING_TIMEOUT_SECONDS, "embedding"
+            )
+        return await run_blocking(
+            embedding_model_ref.embed_query, query,
+            timeout=config.EMBEDDING_TIMEOUT_SECONDS, stage="embedding"
+        )
+
+async def get_recommendations(
+    query: str,
+    snapshot_ref: CatalogSnapshot,
+    analysis_cache: Optional[QueryAnalysisCache] = None,
+    semantic_cache: Optional[SemanticResultCache] = None,
+    embedding_model_ref: Optional[Any] = None,
+    bypass_cache: bool = False,
+    batcher: Optional[RetrievalBatcher] = None
 ) -> List[RecommendedAssessment]:
-    if retriever_ref is None or structured_chain_ref is None or df_ref is None or df_ref.empty:
+    if snapshot_ref is None or len(snapshot_ref.catalog) == 0:
+        raise ValueError("Recommendation engine components are not valid.")
+
+    query_embedding = None
+    if semantic_cache is not None and embedding_model_ref is not None:
+        query_embedding = await embed_query_for_cache(query, embedding_model_ref, batcher)
+        if not bypass_cache:
+            cached = semantic_cache.lookup(query_embedding, namespace=snapshot_ref.version)
+            CACHE_EVENTS.inc("semantic", "miss" if cached is None else "hit")
+            if cached is not None:
+                return cached[0]
+
+    if config.PARALLEL_RETRIEVAL_ENABLED:
+        candidates = await retrieve_with_latency_budget(query, snapshot_ref, analysis_cache, batcher, query_embedding)
+    else:
+        candidates = await retrieve_sequentially(query, snapshot_ref, analysis_cache, batcher, query_embedding)
+
+    ranked = await rerank_with_budget(candidates, snapshot_ref)
+    recommendations = assemble_recommendations(ranked, snapshot_ref.catalog)
+    # Raw-query fallbacks are not cached, so the next request can pick up the refined analysis.
+    if query_embedding is not None and candidates.fallback is None:
+        semantic_cache.store(query_embedding, recommendations, namespace=snapshot_ref.version)
+    return recommendations
+
+def stream_assembly(phase: str, ranked: RankedRows, catalog_ref: CatalogStore) -> Iterator[RecommendationEvent]:
+    assembled = catalog_ref.iter_recommendations(ranked.rows, limit=config.NUM_DOCS_TO_RETURN, scores=ranked.scores)
+    rank = 0
+    while True:
+        with stage_span("assembly"):
+            recommendation = next(assembled, None)
+        if recommendation is None:
+            return
+        yield RecommendationEvent(phase, recommendation, rank)
+        rank += 1
+
+async def stream_recommendations(
+    query: str,
+    snapshot_ref: CatalogSnapshot,
+    analysis_cache: Optional[QueryAnalysisCache] = None,
+    semantic_cache: Optional[SemanticResultCache] = None,
+    embedding_model_ref: Optional[Any] = None,
+    bypass_cache: bool = False,
+    batcher: Optional[RetrievalBatcher] = None
+) -> AsyncIterator[RecommendationEvent]:
+    if snapshot_ref is None or len(snapshot_ref.catalog) == 0:
         raise ValueError("Recommendation engine components are not valid.")
 
-    final_search_query = query
+    query_embedding = None
+    if semantic_cache is not None and embedding_model_ref is not None:
+        query_embedding = await embed_query_for_cache(query, embedding_model_ref, batcher)
+        if not bypass_cache:
+            cached = semantic_cache.lookup(query_embedding, namespace=snapshot_ref.version)
+            CACHE_EVENTS.inc("semantic", "miss" if cached is None else "hit")
+            if cached is not None:
+                for rank, recommendation in enumerate(cached[0]):
+                    yield RecommendationEvent("cached", recommendation, rank)
+                yield RecommendationEvent("cached")
+                return
+
+    retriever_ref, lexical_index = snapshot_ref.retriever, snapshot_ref.lexical_index
+    analysis_task = asyncio.create_task(analyze_query(query, snapshot_ref.structured_chain, analysis_cache, snapshot_ref.analysis_fingerprint))
     try:
-        structured_result: Optional[AssessmentSearchCriteria] = await structured_chain_ref.ainvoke({"original_query": query})
-        if structured_result and (structured_result.job_role or structured_result.candidate_level or structured_result.key_skills_or_concepts):
-            final_search_query = construct_search_query_from_structured(structured_result)
+        # The semantic-cache lookup already embedded the raw query; search with that vector.
+        raw = await retrieve_candidates(retriever_ref, query, batcher, lexical_index, query_vector=query_embedding)
+        raw_ranked = await rerank_with_budget(raw, snapshot_ref)
+        for event in stream_assembly("raw", raw_ranked, snapshot_ref.catalog):
+            yield event
+        yield RecommendationEvent("raw")
 
-        retrieved_docs = retriever_ref.get_relevant_documents(final_search_query)
+        fallback = None
+        try:
+            structured_result = await analysis_task
+        except Exception as e:
+            fallback = fallback_reason(e)
+            LLM_FALLBACKS.inc(fallback)
+            logger.warning("LLM query analysis failed (%s); the raw-query results are final.", e)
+            structured_result = None
+
+        final_ranked = raw_ranked
+        refined_query = build_search_query(structured_result, query)
+        selection = select_rows(snapshot_ref.facet_index, structured_result)
+        if refined_query is not None or selection is not None:
+            refined = await retrieve_candidates(
+                retriever_ref, refined_query or query, batcher, lexical_index, selection, structured_result,
+                query_vector=None if refined_query else query_embedding
+            )
+            final = merge_raw_candidates(refined, raw, selection) if config.MERGE_RAW_QUERY_RESULTS else refined
+            final_ranked = await rerank_with_budget(final, snapshot_ref)
 
         recommendations = []
-        processed_indices = set()
-        for doc in retrieved_docs:
-            if len(recommendations) >= config.NUM_DOCS_TO_RETURN:
-                break
-            row_index = doc.metadata.get("row_index")
-            if row_index is None:
-                continue
-            try:
-                row_index = int(row_index)
-            except (ValueError, TypeError):
-                continue
-            if row_index in processed_indices or row_index not in df_ref.index:
-                continue
-            processed_indices.add(row_index)
-            assessment_data = {}
-            for json_field in config.TARGET_JSON_FIELDS:
-                metadata_key = config.TARGET_FIELD_TO_METADATA_KEY.get(json_field)
-                if metadata_key:
-                    assessment_data[json_field] = doc.metadata.get(metadata_key)
+        for event in stream_assembly("refined", final_ranked, snapshot_ref.catalog):
+            recommendations.append(event.recommendation)
+            yield event
+        yield RecommendationEvent("refined", fallback=fallback)
+        if query_embedding is not None and fallback is None:
+            semantic_cache.store(query_embedding, recommendations, namespace=snapshot_ref.version)
+    finally:
+        # A client that disconnects early leaves the analysis running; it still lands in the cache.
+        analysis_task.add_done_callback(_discard_task_result)
+
+def search_vectors_with_selections(
+    target_vectorstore: FAISS,
+    query_vectors: Any,
+    k: int,
+    selections: List[Optional[FacetSelection]]
+) -> List[List[Tuple[int, float]]]:
+    results: List[List[Tuple[int, float]]] = [[] for _ in selections]
+    unfiltered = [position for position, selection in enumerate(selections) if selection is None]
+    if unfiltered:
+        for position, hits in zip(unfiltered, search_vectors(target_vectorstore, query_vectors[unfiltered], k)):
+            results[position] = hits
+    for position, selection in enumerate(selections):
+        if selection is not None:
+            results[position] = search_vectors(target_vectorstore, query_vectors[position], k, selection.row_ids)[0]
+    return results
+
+async def embed_batch_queries(embedding_model_ref: Any, search_queries: List[str]) -> np.ndarray:
+    batch_size = config.EMBEDDING_BATCH_SIZE
+    vectors = []
+    with stage_span("embedding"):
+        for start in range(0, len(search_queries), batch_size):
+            # The timeout bounds each provider call, not the whole batch.
+            vectors.append(await run_blocking(
+                embed_search_queries, embedding_model_ref, search_queries[start:start + batch_size],
+                timeout=config.EMBEDDING_TIMEOUT_SECONDS, stage="embedding"
+            ))
+    return np.concatenate(vectors)
+
+async def get_batch_recommendations(
+    queries: List[str],
+    snapshot_ref: CatalogSnapshot,
+    embedding_model_ref: Any,
+    analysis_cache: Optional[QueryAnalysisCache] = None
+) -> List[List[RecommendedAssessment]]:
+    if snapshot_ref is None or embedding_model_ref is None or len(snapshot_ref.catalog) == 0:
+        raise ValueError("Recommendation engine components are not valid.")
+    if not queries:
+        return []
+
+    llm_slots = asyncio.Semaphore(config.BATCH_LLM_CONCURRENCY)
+
+    async def analyze_with_limit(query: str) -> Optional[AssessmentSearchCriteria]:
+        async with llm_slots:
             try:
-                recommendations.append(RecommendedAssessment(**assessment_data))
-            except Exception:
-                continue
+                return await analyze_query(query, snapshot_ref.structured_chain, analysis_cache, snapshot_ref.analysis_fingerprint)
+            except Exception as e:
+                LLM_FALLBACKS.inc(fallback_reason(e))
+                logger.warning("LLM query analysis failed for a batch query (%s); using the raw query.", e)
+                return None
 
-        return recommendations
+    structured_results = await asyncio.gather(*(analyze_with_limit(query) for query in queries))
+    search_queries = [
+        build_search_query(structured_result, query) or query
+        for query, structured_result in zip(queries, structured_results)
+    ]
 
-    except Exception as e:
-        raise
\ No newline at end of file
+    query_vectors = await embed_batch_queries(embedding_model_ref, search_queries)
+    selections = [select_rows(snapshot_ref.facet_index, structured_result) for structured_result in structured_results]
+    with stage_span("retrieval"):
+        search_results = await run_blocking(
+            search_vectors_with_selections, snapshot_ref.retriever.vectorstore, query_vectors,
+            candidate_pool_size(config.NUM_DOCS_TO_RETRIEVE), selections,
+            timeout=config.RETRIEVAL_TIMEOUT_SECONDS, stage="retrieval"
+        )
+    candidate_lists = [
+        RetrievedCandidates(
+            fuse_with_lexical(hit_rows(hits), search_query, snapshot_ref.lexical_index, selection),
+            hit_similarities(hits), search_query, structured_result
+        )
+        for search_query, hits, selection, structured_result in zip(search_queries, search_results, selections, structured_results)
+    ]
+    ranked_lists = await asyncio.gather(*(rerank_with_budget(candidates, snapshot_ref) for candidates in candidate_lists))
+    return [assemble_recommendations(ranked, snapshot_ref.catalog) for ranked in ranked_lists]